@@ -23,7 +23,7 @@ USE `learning_platform` ;
 CREATE TABLE IF NOT EXISTS `learning_platform`.`users` (
   `user_id` INT(11) NOT NULL AUTO_INCREMENT,
   `email` VARCHAR(45) NULL,
-  `password` VARCHAR(45) NOT NULL,
+  `password` VARCHAR(255) NOT NULL,
   `is_admin` TINYINT NULL DEFAULT 0,
   PRIMARY KEY (`user_id`),
   UNIQUE INDEX `admin_id_UNIQUE` (`user_id` ASC) VISIBLE,
@@ -66,9 +66,14 @@ CREATE TABLE IF NOT EXISTS `learning_platform`.`courses` (
   `owner_id` INT(11) NOT NULL,
   `is_premium` TINYINT(4) NULL DEFAULT 0,
   `rating` DECIMAL(3,2) NULL DEFAULT 0.00,
+  `revision` INT(11) NOT NULL DEFAULT 0,
+  `rating_sum` INT(11) NOT NULL DEFAULT 0,
+  `rating_count` INT(11) NOT NULL DEFAULT 0,
   PRIMARY KEY (`course_id`),
   UNIQUE INDEX `title` (`title` ASC) VISIBLE,
   INDEX `owner_id` (`owner_id` ASC) VISIBLE,
+  INDEX `is_premium_course_id_idx` (`is_premium` ASC, `course_id` ASC) VISIBLE,
+  INDEX `rating_course_id_idx` (`rating` ASC, `course_id` ASC) VISIBLE,
   CONSTRAINT `courses_ibfk_1`
     FOREIGN KEY (`owner_id`)
     REFERENCES `learning_platform`.`teachers` (`teacher_id`))
@@ -153,8 +158,10 @@ ENGINE = InnoDB;
 CREATE TABLE IF NOT EXISTS `learning_platform`.`enrollments` (
   `students_student_id` INT(11) NOT NULL,
   `courses_course_id` INT(11) NOT NULL,
+  `enrolled_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`students_student_id`, `courses_course_id`),
   INDEX `fk_students_has_courses_courses1_idx` (`courses_course_id` ASC) VISIBLE,
+  INDEX `courses_course_id_enrolled_at_idx` (`courses_course_id` ASC, `enrolled_at` ASC) VISIBLE,
   INDEX `fk_students_has_courses_students1_idx` (`students_student_id` ASC) VISIBLE,
   CONSTRAINT `fk_students_has_courses_students1`
     FOREIGN KEY (`students_student_id`)
@@ -191,6 +198,68 @@ CREATE TABLE IF NOT EXISTS `learning_platform`.`students_has_sections` (
 ENGINE = InnoDB;
 
 
+-- -----------------------------------------------------
+-- Table `learning_platform`.`token_blacklist`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`token_blacklist` (
+  `id` INT(11) NOT NULL AUTO_INCREMENT,
+  `token_hash` CHAR(64) NOT NULL,
+  `expires_at` DATETIME NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE INDEX `token_hash_UNIQUE` (`token_hash` ASC) VISIBLE,
+  INDEX `expires_at_idx` (`expires_at` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+
+-- -----------------------------------------------------
+-- Table `learning_platform`.`catalogue_version`
+-- Counters compared by workers to invalidate their cached public catalogue responses: row 1 is
+-- bumped by every course and tag change, row 2 by every course rating.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`catalogue_version` (
+  `id` TINYINT(4) NOT NULL,
+  `version` BIGINT(20) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id`))
+ENGINE = InnoDB;
+
+INSERT IGNORE INTO `learning_platform`.`catalogue_version` (`id`, `version`) VALUES (1, 0), (2, 0);
+
+
+-- -----------------------------------------------------
+-- Table `learning_platform`.`catalogue_changes`
+-- One row per course whose catalogue data (text, tags, premium flag, rating) changed. Workers pull
+-- new rows to update their in-process course search index. Rows older than a day are purged.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`catalogue_changes` (
+  `id` BIGINT(20) NOT NULL AUTO_INCREMENT,
+  `course_id` INT(11) NOT NULL,
+  `changed_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  INDEX `changed_at` (`changed_at` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+
+-- -----------------------------------------------------
+-- Table `learning_platform`.`course_ratings`
+-- One rating (1-5) per enrolled student and course. `courses` keeps the running sum and count of
+-- its ratings and their average in `rating`, updated in the same transaction as every rating.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`course_ratings` (
+  `student_id` INT(11) NOT NULL,
+  `course_id` INT(11) NOT NULL,
+  `rating` TINYINT(4) NOT NULL,
+  `rated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`student_id`, `course_id`),
+  INDEX `course_id` (`course_id` ASC) VISIBLE,
+  CONSTRAINT `course_ratings_ibfk_1`
+    FOREIGN KEY (`student_id`)
+    REFERENCES `learning_platform`.`students` (`student_id`),
+  CONSTRAINT `course_ratings_ibfk_2`
+    FOREIGN KEY (`course_id`)
+    REFERENCES `learning_platform`.`courses` (`course_id`))
+ENGINE = InnoDB;
+
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
@@ -1,14 +1,38 @@
-from services.users_service import verify_jwt_token, get_by_id, is_token_blacklisted
-from common.responses import Unauthorized
-
-
-def get_user_or_raise_401(token: str):
-    payload = verify_jwt_token(token)
-    if payload:
-        user_id = payload.get("user_id")
-        if is_token_blacklisted(token):
-            return Unauthorized(content="User is logged out! Please log in order to perform this task!")
-        user = get_by_id(user_id)
-        if user:
-            return user
-    return Unauthorized(content="Invalid token")
+from fastapi import Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+from jose import JWTError
+from data.models import Principal, User, Teacher, Student
+from services.users_service import verify_jwt_token, get_principal, is_token_blacklisted
+from common.constants import USER_LOGGED_OUT_MESSAGE
+
+
+async def current_principal(token: str = Header()) -> Principal:
+    try:
+        payload = verify_jwt_token(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    if await run_in_threadpool(is_token_blacklisted, token):
+        raise HTTPException(status_code=401, detail=USER_LOGGED_OUT_MESSAGE)
+
+    principal = await get_principal(payload.get("user_id"))
+    if not principal:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    return principal
+
+
+async def current_user(principal: Principal = Depends(current_principal)) -> User:
+    return principal.user
+
+
+async def current_teacher(principal: Principal = Depends(current_principal)) -> Teacher:
+    if not principal.teacher:
+        raise HTTPException(status_code=403, detail="User must be a teacher to perform this task!")
+    return principal.teacher
+
+
+async def current_student(principal: Principal = Depends(current_principal)) -> Student:
+    if not principal.student:
+        raise HTTPException(status_code=403, detail="User must be a student to perform this task!")
+    return principal.student
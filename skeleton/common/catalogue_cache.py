@@ -0,0 +1,132 @@
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from common.cache import TTLCache
+from data import async_database
+from data.database import after_commit, insert_query, standalone, update_query
+
+
+# Rows of the `catalogue_version` table.
+CATALOGUE_VERSION_ID = 1
+RATINGS_VERSION_ID = 2
+
+
+class CatalogueCache:
+    """
+        Serialized responses of the public catalogue endpoints.
+
+        Every entry is tagged with the catalogue version it was built from: the counters
+        `version_ids` of the `catalogue_version` table. Every course and tag change bumps the
+        catalogue counter and every rating the ratings counter in its own transaction, so all
+        workers see them. Each worker reads it from the primary at most every
+        `check_interval` seconds and ignores entries built from an older version. A change made on
+        another worker is therefore served stale for up to `check_interval` seconds.
+
+        Entries are built from the primary too: a replica that lags behind could otherwise return
+        the old catalogue, which would then be cached as the new version until the next change.
+    """
+
+    def __init__(self, version_ids: tuple[int, ...] = (CATALOGUE_VERSION_ID,), check_interval: float = 1,
+                 max_size: int = 10_000):
+        self.version_ids = version_ids
+        self.check_interval = check_interval
+        self._entries = TTLCache(max_size=max_size, ttl=3600)
+        self._version: tuple[int, ...] | None = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    async def version(self) -> tuple[int, ...]:
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            placeholders = ", ".join("?" * len(self.version_ids))
+            data = await async_database.read_query(
+                f"""select id, version from catalogue_version where id in ({placeholders})""",
+                self.version_ids, primary=True)
+            versions = dict(data)
+            self._version = tuple(versions.get(version_id, 0) for version_id in self.version_ids)
+        return self._version
+
+    async def response(self, key: Hashable, build: Callable[[], Awaitable]) -> Response:
+        """
+            Return the cached response for `key`, or build, cache and return it. Responses returned
+            by `build` (errors) are passed through without being cached.
+        """
+        version = await self.version()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return Response(content=entry[1], media_type="application/json")
+
+        self.misses += 1
+        with async_database.reading_from_primary():
+            result = await build()
+        if isinstance(result, Response):
+            return result
+
+        body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+        self._entries.set(key, (version, body))
+        return Response(content=body, media_type="application/json")
+
+    def expire_version(self):
+        self._checked_at = 0.0
+
+    def stats(self) -> dict:
+        entries = self._entries.stats()
+        return {"version": self._version, "check_interval_seconds": self.check_interval, "size": entries["size"],
+                "max_size": entries["max_size"], "hits": self.hits, "misses": self.misses}
+
+
+catalogue_cache = CatalogueCache()
+# Responses that show course ratings (top-rated courses). They also change with the catalogue, so
+# they check both counters; the other catalogue responses are not affected by ratings.
+ratings_cache = CatalogueCache((CATALOGUE_VERSION_ID, RATINGS_VERSION_ID))
+
+
+def _bump_version(version_id: int):
+    update_query("""update catalogue_version set version = version + 1 where id = ?""", (version_id,))
+
+
+def _record_changes(course_ids: tuple[int, ...]):
+    for course_id in course_ids:
+        insert_query("""insert into catalogue_changes (course_id, changed_at) values (?, ?)""",
+                     (course_id, datetime.utcnow()))
+
+
+def bump_catalogue_version(*course_ids: int):
+    """
+        Mark the public catalogue as changed. Called by every course and tag write, inside the same
+        transaction, so the new version becomes visible together with the change. `course_ids` are
+        the courses whose own data changed; they are recorded in `catalogue_changes` for the search
+        index.
+    """
+    _bump_version(CATALOGUE_VERSION_ID)
+    _record_changes(course_ids)
+    # Expired once the change commits: a request re-reading the version before that would still
+    # get the old one and keep it for `check_interval` seconds.
+    after_commit(catalogue_cache.expire_version)
+    after_commit(ratings_cache.expire_version)
+
+
+def bump_ratings_version(*course_ids: int):
+    """
+        Mark the ratings of `course_ids` as changed. Called by every rating, inside its transaction,
+        which records the courses in `catalogue_changes` for the search index. The ratings counter
+        is one row shared by all courses, so it is bumped in its own transaction once the rating
+        commits; bumping it inside would make every rating wait for the lock of the one before.
+        Only `ratings_cache` is invalidated.
+    """
+    _record_changes(course_ids)
+    after_commit(_bump_ratings_version)
+
+
+def _bump_ratings_version():
+    with standalone():
+        _bump_version(RATINGS_VERSION_ID)
+    ratings_cache.expire_version()
@@ -1,5 +1,11 @@
-from common.responses import Unauthorized
-
 PREMIUM_COURSE_LIMIT = 5
 
-USER_LOGGED_OUT_RESPONSE = Unauthorized(content="User is logged out! Login required to perform this task!")
\ No newline at end of file
+USER_LOGGED_OUT_MESSAGE = "User is logged out! Login required to perform this task!"
+
+DEFAULT_PAGE_SIZE = 50
+
+MAX_PAGE_SIZE = 100
+
+MIN_RATING = 1
+
+MAX_RATING = 5
@@ -0,0 +1,17 @@
+import hashlib
+
+
+def course_etag(course_id: int, revision: int, *variant) -> str:
+    """
+        Strong ETag of a course read. `variant` holds the request parameters that change the body
+        (e.g. section order and title filter), so each variant is validated separately.
+    """
+    variant_hash = hashlib.sha256(repr(variant).encode("utf-8")).hexdigest()[:12]
+    return f'"{course_id}.{revision}.{variant_hash}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
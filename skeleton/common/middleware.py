@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+import math
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import cookie_parser
+from data.database import begin_session, end_session, settings
+
+
+WRITE_PIN_COOKIE = "poodle_wrote_at"
+
+
+class DatabaseSessionMiddleware:
+    """
+        Opens a request-scoped database session for every HTTP request.
+
+        All query helpers called while handling the request share the session's connection and
+        transaction. The transaction is committed right before the response starts, so the client
+        never sees a success response for data that is not committed yet. It is rolled back for
+        error responses (status >= 400) and unhandled exceptions.
+
+        Read-your-writes: a response to a request that wrote carries a cookie with the time of the
+        write, signed with `secret`. For `pin_seconds` afterwards the client's requests read from the
+        primary instead of a replica, on whichever worker they land.
+    """
+
+    def __init__(self, app, secret: str, pin_seconds: float = settings.read_your_writes_seconds):
+        self.app = app
+        self.secret = secret.encode("utf-8")
+        self.pin_seconds = pin_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session = begin_session(pinned_to_primary=self._wrote_recently(scope))
+        finished = False
+
+        async def send_after_commit(message):
+            nonlocal finished
+            if message["type"] == "http.response.start" and not finished:
+                finished = True
+                succeeded = message["status"] < 400
+                if session.active:
+                    await run_in_threadpool(_finish, session, succeeded)
+                if session.wrote and succeeded:
+                    message = {**message, "headers": [*message.get("headers", []), self._pin_cookie()]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_commit)
+        finally:
+            if session.active:
+                await run_in_threadpool(_finish, session, False)
+            end_session()
+
+    def _sign(self, value: str) -> str:
+        return hmac.new(self.secret, value.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _pin_cookie(self) -> tuple[bytes, bytes]:
+        wrote_at = f"{time.time():.3f}"
+        value = f"{wrote_at}.{self._sign(wrote_at)}"
+        max_age = math.ceil(self.pin_seconds)
+        return b"set-cookie", f"{WRITE_PIN_COOKIE}={value}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax".encode()
+
+    def _wrote_recently(self, scope) -> bool:
+        value = _cookies(scope).get(WRITE_PIN_COOKIE)
+        if not value:
+            return False
+
+        wrote_at, _, signature = value.rpartition(".")
+        if not hmac.compare_digest(signature, self._sign(wrote_at)):
+            return False
+        try:
+            return time.time() - float(wrote_at) < self.pin_seconds
+        except ValueError:
+            return False
+
+
+def _finish(session, commit: bool):
+    try:
+        if commit:
+            session.commit()
+        else:
+            session.rollback()
+    finally:
+        session.close()
+
+
+def _cookies(scope) -> dict[str, str]:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            return cookie_parser(value.decode("latin-1"))
+    return {}
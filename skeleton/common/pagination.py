@@ -0,0 +1,121 @@
+import base64
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+from common.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# The values a cursor may carry: they are bound as query parameters, so anything else is rejected
+# before it reaches the driver.
+CURSOR_VALUE_TYPES = (str, int, float)
+
+
+class Page(BaseModel):
+    items: list
+    next: Optional[str] = None
+
+
+class SortKey:
+    """
+        A stable sort order for keyset pagination.
+
+        `columns` are the SQL columns to order by and must end with a unique one, so no two rows
+        compare equal. `values` reads the same values from a result item, to build the cursor of the
+        next page.
+    """
+
+    def __init__(self, columns: tuple[str, ...], values: Callable[[Any], tuple]):
+        self.columns = columns
+        self.values = values
+
+
+def encode_cursor(sort: str, descending: bool, values: tuple) -> str:
+    data = json.dumps([sort, descending, list(values)], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, bool, list]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort, descending, values = json.loads(data)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid page cursor")
+    return sort, descending, values
+
+
+class PageRequest:
+    """
+        One page of a keyset-paginated query.
+
+        Instead of an offset, a page starts right after the last row of the previous page, so every
+        page costs the same index range scan no matter how deep it is. Services add `where()` to their
+        filters, order by `order_by`, fetch `fetch_limit` rows and wrap the result with `page()`.
+    """
+
+    def __init__(self, sort: str, sort_key: SortKey, descending: bool = False, after: list | None = None,
+                 limit: int = DEFAULT_PAGE_SIZE):
+        self.sort = sort
+        self.sort_key = sort_key
+        self.descending = descending
+        self.after = after
+        self.limit = limit
+
+    @property
+    def order_by(self) -> str:
+        direction = " desc" if self.descending else ""
+        return ", ".join(column + direction for column in self.sort_key.columns)
+
+    @property
+    def fetch_limit(self) -> int:
+        return self.limit + 1
+
+    def where(self) -> tuple[str, tuple]:
+        if self.after is None:
+            return "", ()
+
+        operator = "<" if self.descending else ">"
+        columns = self.sort_key.columns
+        clauses = []
+        params = []
+        for index, column in enumerate(columns):
+            conditions = [f"{previous} = ?" for previous in columns[:index]] + [f"{column} {operator} ?"]
+            clauses.append("(" + " and ".join(conditions) + ")")
+            params.extend(self.after[:index + 1])
+
+        return "(" + " or ".join(clauses) + ")", tuple(params)
+
+    def page(self, items: list) -> Page:
+        if len(items) <= self.limit:
+            return Page(items=items)
+
+        items = items[:self.limit]
+        return Page(items=items, next=encode_cursor(self.sort, self.descending, self.sort_key.values(items[-1])))
+
+
+def paginated(sort_keys: dict[str, SortKey], default_sort: str, default_order: str = "asc"):
+    """
+        Build a dependency that reads the `cursor`, `limit`, `sort` and `order` query parameters of a
+        list endpoint into a PageRequest. `sort_keys` names the sort orders the endpoint supports.
+    """
+
+    def page_request(cursor: str = Query(None, description="The `next` value of the previous page."),
+                     limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                     sort: str = Query(default_sort, regex=f"^({'|'.join(sort_keys)})$"),
+                     order: str = Query(default_order, regex="^(asc|desc)$")) -> PageRequest:
+        sort_key = sort_keys[sort]
+        descending = order == "desc"
+        after = None
+
+        if cursor is not None:
+            cursor_sort, cursor_descending, after = decode_cursor(cursor)
+            if cursor_sort != sort or cursor_descending != descending or \
+                    not isinstance(after, list) or len(after) != len(sort_key.columns):
+                raise HTTPException(status_code=400, detail="Page cursor does not match the requested sort order")
+            if not all(value is None or isinstance(value, CURSOR_VALUE_TYPES) for value in after):
+                raise HTTPException(status_code=400, detail="Invalid page cursor")
+
+        return PageRequest(sort, sort_key, descending, after, limit)
+
+    return page_request
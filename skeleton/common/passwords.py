@@ -0,0 +1,128 @@
+import asyncio
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+BCRYPT_ROUNDS = int(os.environ.get("POODLE_BCRYPT_ROUNDS", 12))
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_MAX_PENDING = 64
+PASSWORD_HASHING_QUEUE_TIMEOUT_SECONDS = 1
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+        Runs bcrypt on a small dedicated thread pool.
+
+        bcrypt releases the GIL, so the pool uses at most `workers` cores no matter how many
+        registrations and logins arrive at once. At most `max_pending` operations are queued or
+        running. Async callers hold no thread while they wait and get PasswordHashingBusy at once
+        when the queue is full. Sync callers (scripts) block their thread, wait up to
+        `queue_timeout` seconds for a slot and then get PasswordHashingBusy instead of piling up.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int, queue_timeout: float):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hashing")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def hash(self, password: str) -> str:
+        hashed = self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+        return hashed.decode("utf-8")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        if not hashed.startswith("$2"):
+            return hmac.compare_digest(password.encode("utf-8"), hashed.encode("utf-8"))
+        return self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    async def hash_async(self, password: str) -> str:
+        hashed = await self._run_async(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+        return hashed.decode("utf-8")
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        if not hashed.startswith("$2"):
+            return hmac.compare_digest(password.encode("utf-8"), hashed.encode("utf-8"))
+        return await self._run_async(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "queue_depth": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def _acquire(self, timeout: float | None):
+        acquired = self._slots.acquire(timeout=timeout) if timeout else self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashingBusy("Too many password operations in progress")
+
+        with self._lock:
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def _run(self, function, *args):
+        self._acquire(self.queue_timeout)
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._release()
+
+    async def _run_async(self, function, *args):
+        self._acquire(None)
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the operation finishes, even if the awaiting request is cancelled.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    workers=PASSWORD_HASHING_WORKERS,
+    max_pending=PASSWORD_HASHING_MAX_PENDING,
+    queue_timeout=PASSWORD_HASHING_QUEUE_TIMEOUT_SECONDS
+)
+
+
+def hash_password(password: str) -> str:
+    return password_hasher.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return password_hasher.verify(password, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash_async(password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await password_hasher.verify_async(password, hashed)
@@ -33,6 +33,16 @@ class NoContent(Response):
         super().__init__(status_code=204)
 
 
+class NotModified(Response):
+    def __init__(self, etag: str):
+        super().__init__(status_code=304, headers={"ETag": etag})
+
+
+class ServiceUnavailable(Response):
+    def __init__(self, content="", retry_after: int = 1):
+        super().__init__(status_code=503, content=content, headers={"Retry-After": str(retry_after)})
+
+
 class InternalServerError(Response):
     def __init__(self, content=""):
         super().__init__(status_code=500, content=content )
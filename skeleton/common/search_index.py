@@ -0,0 +1,145 @@
+import heapq
+import math
+import re
+from typing import Callable, Iterable
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "objectives": 1.0, "description": 1.0}
+
+
+def tokenize(text: str | None) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class CourseDocument:
+    __slots__ = ("course_id", "title", "description", "objectives", "is_premium", "rating", "tags")
+
+    def __init__(self, course_id: int, title: str, description: str, objectives: str, is_premium: bool,
+                 rating: float, tags: Iterable[str] = ()):
+        self.course_id = course_id
+        self.title = title
+        self.description = description
+        self.objectives = objectives
+        self.is_premium = is_premium
+        self.rating = rating
+        self.tags = tuple(sorted(tags))
+
+    def tag_keys(self) -> set[str]:
+        return {tag.lower() for tag in self.tags}
+
+    def term_weights(self) -> dict[str, float]:
+        weights = {}
+        fields = {"title": self.title, "description": self.description, "objectives": self.objectives,
+                  "tags": " ".join(self.tags)}
+        for field, text in fields.items():
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + FIELD_WEIGHTS[field]
+        return weights
+
+
+class CourseSearchIndex:
+    """
+        In-process inverted index over the text and tags of the courses.
+
+        Every term maps to the courses that contain it and the term's weight in each course: its
+        number of occurrences, counted `FIELD_WEIGHTS` times per field, so a title match outranks a
+        description match. A query matches the courses that contain all of its terms and ranks them
+        by BM25 without length normalisation. Courses are added, replaced and removed one at a time.
+    """
+
+    k1 = 1.2
+
+    def __init__(self):
+        self._documents: dict[int, CourseDocument] = {}
+        self._postings: dict[str, dict[int, float]] = {}
+        self._tags: dict[str, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, document: CourseDocument):
+        self.remove(document.course_id)
+        self._documents[document.course_id] = document
+
+        for term, weight in document.term_weights().items():
+            self._postings.setdefault(term, {})[document.course_id] = weight
+        for tag in document.tag_keys():
+            self._tags.setdefault(tag, set()).add(document.course_id)
+
+    def remove(self, course_id: int):
+        document = self._documents.pop(course_id, None)
+        if document is None:
+            return
+
+        for term in document.term_weights():
+            postings = self._postings[term]
+            del postings[course_id]
+            if not postings:
+                del self._postings[term]
+        for tag in document.tag_keys():
+            courses = self._tags[tag]
+            courses.discard(course_id)
+            if not courses:
+                del self._tags[tag]
+
+    def get(self, course_id: int) -> CourseDocument | None:
+        return self._documents.get(course_id)
+
+    def search(self, query: str | None, tags: Iterable[str] = (), min_rating: float | None = None,
+               keep: Callable[[float, CourseDocument], bool] | None = None,
+               key: Callable[[float, CourseDocument], tuple] | None = None, limit: int | None = None,
+               descending: bool = False) -> list[tuple[float, CourseDocument]]:
+        """
+            Return the (score, document) pairs of the courses that contain every term of `query`,
+            have every tag in `tags` and are rated at least `min_rating`. `keep` filters the pairs
+            further (e.g. the keyset of a page). With a `key`, only the first `limit` pairs in that
+            order are returned.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        candidates = None
+
+        for tag in tags:
+            courses = self._tags.get(tag.lower(), set())
+            candidates = courses if candidates is None else candidates & courses
+
+        postings = []
+        for term in terms:
+            term_postings = self._postings.get(term)
+            if not term_postings:
+                return []
+            postings.append(term_postings)
+
+        postings.sort(key=len)
+        for term_postings in postings:
+            candidates = set(term_postings) if candidates is None else candidates.intersection(term_postings)
+
+        if candidates is None:
+            candidates = self._documents.keys()
+
+        count = len(self._documents)
+        idfs = [math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for term_postings in postings]
+
+        results = []
+        for course_id in candidates:
+            document = self._documents[course_id]
+            if min_rating is not None and (document.rating or 0) < min_rating:
+                continue
+
+            score = 0.0
+            for idf, term_postings in zip(idfs, postings):
+                weight = term_postings[course_id]
+                score += idf * weight * (self.k1 + 1) / (weight + self.k1)
+
+            if keep is None or keep(score, document):
+                results.append((score, document))
+
+        if key is None:
+            return results
+        if limit is None:
+            return sorted(results, key=lambda result: key(*result), reverse=descending)
+
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return pick(limit, results, key=lambda result: key(*result))
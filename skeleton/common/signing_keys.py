@@ -0,0 +1,89 @@
+import json
+import os
+import secrets
+
+
+JWT_KEYS_ENV = "POODLE_JWT_KEYS"
+JWT_KEYS_FILE_ENV = "POODLE_JWT_KEYS_FILE"
+DEFAULT_JWT_KEYS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jwt_keys.json")
+
+
+class SigningKeys:
+    """
+        JWT signing keys identified by key ID (`kid`).
+
+        Tokens are signed with the current key only. All keys are accepted for verification, so a key
+        can be rotated without logging anyone out:
+        1. Add the new key to every worker while keeping the old one current.
+        2. Make the new key current.
+        3. Remove the old key once the last token signed with it has expired.
+    """
+
+    def __init__(self, current_kid: str, keys: dict[str, str]):
+        if current_kid not in keys:
+            raise ValueError(f"Current signing key '{current_kid}' is not among the configured keys")
+        self.current_kid = current_kid
+        self.keys = keys
+
+    @property
+    def current_key(self) -> str:
+        return self.keys[self.current_kid]
+
+    def verification_keys(self, kid: str | None) -> list[str]:
+        if kid in self.keys:
+            return [self.keys[kid]]
+        return [self.current_key] + [key for key_id, key in self.keys.items() if key_id != self.current_kid]
+
+
+def _parse_keys_env(value: str) -> SigningKeys:
+    keys = {}
+    for item in value.split(","):
+        kid, _, key = item.strip().partition(":")
+        if not kid or not key:
+            raise ValueError(f"{JWT_KEYS_ENV} must look like 'kid1:secret1,kid0:secret0'")
+        keys[kid] = key
+    return SigningKeys(next(iter(keys)), keys)
+
+
+def _read_keys_file(path: str) -> SigningKeys:
+    with open(path) as file:
+        data = json.load(file)
+    return SigningKeys(data["current"], data["keys"])
+
+
+def _create_keys_file(path: str):
+    kid = secrets.token_hex(4)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w") as file:
+        json.dump({"current": kid, "keys": {kid: secrets.token_hex(32)}}, file)
+
+    try:
+        os.link(temporary_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temporary_path)
+
+
+def load_signing_keys() -> SigningKeys:
+    """
+        Load the keys from the POODLE_JWT_KEYS environment variable ("kid1:secret1,kid0:secret0", the
+        first one is current) or from the JSON file named by POODLE_JWT_KEYS_FILE
+        ({"current": "kid1", "keys": {"kid1": "secret1", "kid0": "secret0"}}).
+
+        Without either, a key file is generated next to the application on first start. Concurrent
+        workers agree on the same file, and the key survives restarts.
+    """
+    keys_env = os.environ.get(JWT_KEYS_ENV)
+    if keys_env:
+        return _parse_keys_env(keys_env)
+
+    keys_file = os.environ.get(JWT_KEYS_FILE_ENV)
+    if keys_file:
+        return _read_keys_file(keys_file)
+
+    if not os.path.exists(DEFAULT_JWT_KEYS_FILE):
+        _create_keys_file(DEFAULT_JWT_KEYS_FILE)
+
+    return _read_keys_file(DEFAULT_JWT_KEYS_FILE)
@@ -0,0 +1,99 @@
+import csv
+import io
+import itertools
+import json
+import zlib
+from typing import Iterable, Iterator
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+
+CHUNK_SIZE = 64 * 1024
+
+_EMPTY = object()
+
+
+def _to_json(item) -> str:
+    if hasattr(item, "json"):
+        return item.json()
+    return json.dumps(jsonable_encoder(item))
+
+
+def _chunked(parts: Iterable[str]) -> Iterator[bytes]:
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    return accept_encoding is not None and any(
+        encoding.split(";")[0].strip() == "gzip" for encoding in accept_encoding.split(","))
+
+
+def _streaming_response(parts: Iterable[str], media_type: str, headers: dict | None, gzip: bool) -> \
+        StreamingResponse:
+    chunks = _chunked(parts)
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    if gzip:
+        chunks = _gzipped(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def non_empty(items: Iterable) -> Iterator | None:
+    """
+        Return an iterator over `items`, or None if there are none.
+
+        Used to answer an empty result with an error response before a stream is started.
+    """
+    iterator = iter(items)
+    first = next(iterator, _EMPTY)
+    if first is _EMPTY:
+        return None
+    return itertools.chain((first,), iterator)
+
+
+def _csv_lines(columns: Iterable[str], rows: Iterable[Iterable]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in itertools.chain((columns,), rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def ndjson_response(items: Iterable, headers: dict | None = None, gzip: bool = False) -> StreamingResponse:
+    """
+        Stream `items` as newline-delimited JSON, one item per line.
+    """
+    lines = (_to_json(item) + "\n" for item in items)
+    return _streaming_response(lines, "application/x-ndjson", headers, gzip)
+
+
+def csv_response(columns: Iterable[str], rows: Iterable[Iterable], filename: str, gzip: bool = False) -> \
+        StreamingResponse:
+    """
+        Stream `rows` as a CSV file download, with `columns` as the header line.
+    """
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return _streaming_response(_csv_lines(columns, rows), "text/csv", headers, gzip)
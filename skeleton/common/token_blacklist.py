@@ -0,0 +1,200 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+
+from data.database import read_query, insert_query, delete_query, standalone
+
+
+def token_fingerprint(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """
+        Fixed-size bloom filter over token fingerprints.
+
+        `might_contain` never returns False for an added fingerprint, and returns True for an
+        unknown one with a probability of roughly `error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, fingerprint: str):
+        digest = bytes.fromhex(fingerprint)
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, fingerprint: str):
+        for position in self._positions(fingerprint):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, fingerprint: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(fingerprint))
+
+
+class TokenBlacklist:
+    """
+        Storage for logged out tokens.
+
+        Only the SHA-256 fingerprint of a token is stored, and only until the token itself expires.
+    """
+
+    def add(self, token: str, expires_at: float):
+        raise NotImplementedError
+
+    def contains(self, token: str) -> bool:
+        raise NotImplementedError
+
+
+class InMemoryTokenBlacklist(TokenBlacklist):
+    """
+        Per-process blacklist. Expired entries are swept every `sweep_interval` seconds.
+    """
+
+    def __init__(self, sweep_interval: float = 60):
+        self.sweep_interval = sweep_interval
+        self._entries: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def add(self, token: str, expires_at: float):
+        with self._lock:
+            self._entries[token_fingerprint(token)] = expires_at
+        self._sweep_if_due()
+
+    def contains(self, token: str) -> bool:
+        self._sweep_if_due()
+        expires_at = self._entries.get(token_fingerprint(token))
+        return expires_at is not None and expires_at > time.time()
+
+    def _sweep_if_due(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+
+        with self._lock:
+            self._last_sweep = now
+            self._entries = {fingerprint: expires_at for fingerprint, expires_at in self._entries.items()
+                             if expires_at > now}
+
+
+class DatabaseTokenBlacklist(TokenBlacklist):
+    """
+        Blacklist stored in the `token_blacklist` table and shared by all workers.
+
+        Every worker keeps a bloom filter of the blacklisted fingerprints and pulls new rows into it
+        at most every `refresh_interval` seconds. The common "not blacklisted" check is answered from
+        the filter without any I/O. Only possible hits are confirmed with a query. A token logged out
+        on another worker can therefore be accepted for up to `refresh_interval` seconds. Row ids are
+        allocated before the logout commits, so a gap in the ids is re-read until it fills or
+        `settle_seconds` pass. Expired rows are deleted and the filter is rebuilt every
+        `rebuild_interval` seconds.
+    """
+
+    def __init__(self, refresh_interval: float = 1, settle_seconds: float = 10, rebuild_interval: float = 600,
+                 capacity: int = 100_000):
+        self.refresh_interval = refresh_interval
+        self.settle_seconds = settle_seconds
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity)
+        self._last_id: int | None = None
+        self._gap_since: float | None = None
+        # The monotonic clock starts near the host's uptime, so "never" must compare as long ago.
+        self._last_refresh = float("-inf")
+        self._last_rebuild = float("-inf")
+
+    def add(self, token: str, expires_at: float):
+        fingerprint = token_fingerprint(token)
+        insert_query(
+            """insert into token_blacklist (token_hash, expires_at) values (?, ?)
+               on duplicate key update expires_at = values(expires_at)""",
+            (fingerprint, datetime.utcfromtimestamp(expires_at)))
+        with self._lock:
+            self._bloom.add(fingerprint)
+
+    def contains(self, token: str) -> bool:
+        fingerprint = token_fingerprint(token)
+        self._refresh_if_due()
+
+        if not self._bloom.might_contain(fingerprint):
+            return False
+
+        data = read_query(
+            """select 1 from token_blacklist where token_hash = ? and expires_at > ?""",
+            (fingerprint, datetime.utcnow()))
+        return bool(data)
+
+    def _refresh_if_due(self):
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+
+        with self._lock:
+            if now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+
+            if self._last_id is None or now - self._last_rebuild >= self.rebuild_interval:
+                self._last_rebuild = now
+                self._rebuild()
+
+            rows = read_query(
+                """select id, token_hash from token_blacklist where id > ? order by id""",
+                (self._last_id,))
+            for _, fingerprint in rows:
+                self._bloom.add(fingerprint)
+            self._settle(rows, now)
+
+    def _rebuild(self):
+        # The new filter is only swapped in once it is complete: `contains` reads the filter
+        # without the lock and must never see an empty one.
+        with standalone():
+            delete_query("""delete from token_blacklist where expires_at <= ?""", (datetime.utcnow(),))
+        rows = read_query("""select id, token_hash from token_blacklist order by id""")
+
+        bloom = BloomFilter(max(self.capacity, len(rows) * 2))
+        for _, fingerprint in rows:
+            bloom.add(fingerprint)
+        self._bloom = bloom
+
+        # The first build starts following new rows after the newest one. Later builds leave the
+        # position alone, so rows of a pending gap are still picked up.
+        if self._last_id is None:
+            self._last_id = rows[-1][0] if rows else 0
+
+    def _settle(self, rows: list, now: float):
+        if not rows:
+            return
+
+        settled_id = self._last_id
+        for row_id, _ in rows:
+            if row_id != settled_id + 1:
+                break
+            settled_id = row_id
+
+        if settled_id == rows[-1][0]:
+            self._gap_since = None
+        elif self._gap_since is None:
+            self._gap_since = now
+        elif now - self._gap_since >= self.settle_seconds:
+            settled_id = rows[-1][0]
+            self._gap_since = None
+
+        self._last_id = settled_id
+
+
+def create_token_blacklist(backend: str) -> TokenBlacklist:
+    if backend == "memory":
+        return InMemoryTokenBlacklist()
+    if backend == "database":
+        return DatabaseTokenBlacklist()
+    raise ValueError(f"Unknown token blacklist backend: {backend}")
@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+import aiomysql
+from data.database import settings, get_db_session
+from data.routing import ReadRouter
+
+
+PRIMARY = (settings.host, settings.port)
+REPLICAS = [(replica.host, replica.port) for replica in settings.replicas]
+
+_pools: dict[tuple[str, int], aiomysql.Pool] = {}
+_pool_locks: dict[tuple[str, int], asyncio.Lock] = {}
+
+
+def _in_use(endpoint: tuple[str, int]) -> int:
+    pool = _pools.get(endpoint)
+    return 0 if pool is None else pool.size - pool.freesize
+
+
+read_router = ReadRouter(PRIMARY, REPLICAS, settings.read_strategy, in_use=_in_use)
+
+
+async def get_pool(endpoint: tuple[str, int] = PRIMARY) -> aiomysql.Pool:
+    pool = _pools.get(endpoint)
+    if pool is not None:
+        return pool
+
+    # Requests that arrive before the pool exists wait for the first one to create it instead of
+    # each creating a pool of their own and leaking all but the last.
+    async with _pool_locks.setdefault(endpoint, asyncio.Lock()):
+        pool = _pools.get(endpoint)
+        if pool is not None:
+            return pool
+
+        host, port = endpoint
+        init_command = None
+        if settings.statement_timeout_seconds is not None:
+            init_command = f"set session max_statement_time = {settings.statement_timeout_seconds}"
+
+        pool = await aiomysql.create_pool(
+            user=settings.user,
+            password=settings.password,
+            host=host,
+            port=port,
+            db=settings.name,
+            minsize=settings.pool_min_size,
+            maxsize=settings.pool_max_size,
+            pool_recycle=settings.pool_recycle_seconds,
+            connect_timeout=settings.connect_timeout_seconds,
+            init_command=init_command,
+            ssl=settings.ssl_context(),
+            autocommit=True
+        )
+        _pools[endpoint] = pool
+        return pool
+
+
+async def close_pool():
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.close()
+        await pool.wait_closed()
+
+
+def _pool_stats(endpoint: tuple[str, int]) -> dict:
+    pool = _pools.get(endpoint)
+    if pool is None:
+        return {"size": 0, "idle": 0, "min_size": settings.pool_min_size, "max_size": settings.pool_max_size}
+    return {"size": pool.size, "idle": pool.freesize, "min_size": pool.minsize, "max_size": pool.maxsize}
+
+
+def get_pool_stats() -> dict:
+    return {
+        "primary": _pool_stats(PRIMARY),
+        "replicas": {f"{host}:{port}": _pool_stats((host, port)) for host, port in REPLICAS},
+    }
+
+
+def _to_driver_sql(sql: str) -> str:
+    return sql.replace("%", "%%").replace("?", "%s")
+
+
+async def _execute(endpoint: tuple[str, int], sql: str, sql_params=()):
+    pool = await get_pool(endpoint)
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(_to_driver_sql(sql), sql_params)
+            return cursor, list(await cursor.fetchall())
+
+
+_reads_from_primary: ContextVar[bool] = ContextVar("reads_from_primary", default=False)
+
+
+@contextmanager
+def reading_from_primary():
+    """
+        Send every read made inside the block to the primary, for results that must be at least as
+        new as a version read from the primary just before.
+    """
+    token = _reads_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _reads_from_primary.reset(token)
+
+
+def _read_endpoint() -> tuple[str, int]:
+    if _reads_from_primary.get():
+        return PRIMARY
+    session = get_db_session()
+    if session is not None and session.reads_from_primary:
+        return PRIMARY
+    return read_router.choose()
+
+
+async def _write(sql: str, sql_params=()):
+    cursor, _ = await _execute(PRIMARY, sql, sql_params)
+    session = get_db_session()
+    if session is not None:
+        session.pinned_to_primary = True
+        session.wrote = True
+    return cursor
+
+
+async def read_query(sql: str, sql_params=(), primary: bool = False):
+    _, rows = await _execute(PRIMARY if primary else _read_endpoint(), sql, sql_params)
+    return rows
+
+
+async def insert_query(sql: str, sql_params=()):
+    cursor = await _write(sql, sql_params)
+    return cursor.lastrowid
+
+
+async def update_query(sql: str, sql_params=()):
+    cursor = await _write(sql, sql_params)
+    return cursor.rowcount
+
+
+async def delete_query(sql: str, sql_params=()):
+    cursor = await _write(sql, sql_params)
+    return cursor.rowcount
@@ -0,0 +1,295 @@
+import threading
+import time
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Callable
+
+from mariadb import Error, InterfaceError, OperationalError
+from mariadb.connections import Connection
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class StatementCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, evicted: int = 0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.evictions += evicted
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class PooledConnection:
+    """
+        A pooled connection with a cache of server-side prepared statements.
+
+        `prepared_cursor` keeps one prepared cursor per SQL text, so a statement is parsed by the
+        server once per connection instead of on every call. At most `statement_cache_size`
+        statements are kept, the least recently used one is closed first.
+    """
+
+    def __init__(self, connection: Connection, statement_cache_size: int = 0,
+                 statement_stats: StatementCacheStats | None = None):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.statement_cache_size = statement_cache_size
+        self._statement_stats = statement_stats or StatementCacheStats()
+        self._statements: OrderedDict = OrderedDict()
+
+    def cursor(self, *args, **kwargs):
+        return self.connection.cursor(*args, **kwargs)
+
+    def prepared_cursor(self, sql: str):
+        if self.statement_cache_size <= 0:
+            return self.connection.cursor()
+
+        cursor = self._statements.get(sql)
+        if cursor is not None:
+            self._statements.move_to_end(sql)
+            self._statement_stats.record(hit=True)
+            return cursor
+
+        cursor = self.connection.cursor(prepared=True)
+        self._statements[sql] = cursor
+        evicted = 0
+        while len(self._statements) > self.statement_cache_size:
+            _, oldest = self._statements.popitem(last=False)
+            _close_cursor(oldest)
+            evicted += 1
+        self._statement_stats.record(hit=False, evicted=evicted)
+        return cursor
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def close(self):
+        self._statements.clear()
+        try:
+            self.connection.close()
+        except Error:
+            pass
+
+
+def _close_cursor(cursor):
+    try:
+        cursor.close()
+    except Error:
+        pass
+
+
+class ConnectionPool:
+    """
+        Thread-safe pool of MariaDB connections.
+
+        Connections are created lazily up to `max_size`. `min_size` is only a floor for pruning: no
+        connection is opened ahead of the first borrow, but once opened, `min_size` of them are kept
+        even when idle.
+        Idle connections older than `idle_timeout` seconds and connections older than `recycle_after`
+        seconds are closed instead of being reused. Every borrowed connection is pinged first when
+        `health_check` is enabled. Each connection caches up to `statement_cache_size` prepared
+        statements.
+    """
+
+    def __init__(self, connect: Callable[[], Connection], min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300, recycle_after: float = 3600, borrow_timeout: float = 10,
+                 health_check: bool = True, statement_cache_size: int = 0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool size must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.recycle_after = recycle_after
+        self.borrow_timeout = borrow_timeout
+        self.health_check = health_check
+        self.statement_cache_size = statement_cache_size
+        self._statement_stats = StatementCacheStats()
+
+        self._idle: deque[PooledConnection] = deque()
+        self._size = 0
+        self._borrowed = 0
+        self._condition = threading.Condition()
+
+        self._waiting = 0
+        self._borrow_count = 0
+        self._wait_count = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._created_count = 0
+        self._discarded_count = 0
+        self._timeout_count = 0
+        self._last_prune = time.monotonic()
+
+    def acquire(self) -> PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.borrow_timeout
+        waited = False
+
+        while True:
+            with self._condition:
+                pooled = self._take_idle()
+                if pooled is None and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeout_count += 1
+                        raise PoolTimeout(f"No database connection available within {self.borrow_timeout} seconds")
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    continue
+                if pooled is None:
+                    self._size += 1
+
+            if pooled is not None:
+                if self._is_healthy(pooled):
+                    break
+                with self._condition:
+                    self._discard(pooled)
+                    self._condition.notify()
+                continue
+
+            try:
+                pooled = PooledConnection(self._connect(), self.statement_cache_size, self._statement_stats)
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._created_count += 1
+            break
+
+        with self._condition:
+            self._on_borrow(started, waited)
+        return pooled
+
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        if not discard:
+            try:
+                pooled.rollback()
+            except Error:
+                discard = True
+
+        with self._condition:
+            self._borrowed -= 1
+            if discard or time.monotonic() - pooled.created_at > self.recycle_after:
+                self._discard(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            self._condition.notify()
+            prune_due = time.monotonic() - self._last_prune > self.idle_timeout / 2
+
+        if prune_due:
+            self.prune()
+
+    @contextmanager
+    def connection(self):
+        pooled = self.acquire()
+        try:
+            yield pooled
+        except (InterfaceError, OperationalError):
+            self.release(pooled, discard=True)
+            raise
+        except BaseException:
+            self.release(pooled)
+            raise
+        else:
+            self.release(pooled)
+
+    def prune(self):
+        with self._condition:
+            self._last_prune = time.monotonic()
+            kept = deque()
+            while self._idle:
+                pooled = self._idle.popleft()
+                if self._size - 1 >= self.min_size and not self._is_fresh(pooled):
+                    self._discard(pooled)
+                else:
+                    kept.append(pooled)
+            self._idle = kept
+
+    def close(self):
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    @property
+    def borrowed(self) -> int:
+        return self._borrowed
+
+    def stats(self) -> dict:
+        statement_cache = self._statement_stats.snapshot()
+        with self._condition:
+            return {
+                "size": self._size,
+                "borrowed": self._borrowed,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "borrow_count": self._borrow_count,
+                "wait_count": self._wait_count,
+                "wait_time_total_seconds": round(self._wait_time_total, 6),
+                "wait_time_max_seconds": round(self._wait_time_max, 6),
+                "timeout_count": self._timeout_count,
+                "created_count": self._created_count,
+                "discarded_count": self._discarded_count,
+                "statement_cache": {"max_size": self.statement_cache_size, **statement_cache},
+            }
+
+    def _is_fresh(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+        return now - pooled.last_used <= self.idle_timeout and now - pooled.created_at <= self.recycle_after
+
+    def _take_idle(self) -> PooledConnection | None:
+        while self._idle:
+            pooled = self._idle.pop()
+            if self._is_fresh(pooled):
+                return pooled
+            self._discard(pooled)
+        return None
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        if not self.health_check:
+            return True
+        try:
+            pooled.connection.ping()
+        except Error:
+            return False
+        return True
+
+    def _on_borrow(self, started: float, waited: bool):
+        wait_time = time.monotonic() - started
+        self._borrowed += 1
+        self._borrow_count += 1
+        if waited:
+            self._wait_count += 1
+        self._wait_time_total += wait_time
+        self._wait_time_max = max(self._wait_time_max, wait_time)
+
+    def _discard(self, pooled: PooledConnection):
+        self._size -= 1
+        self._discarded_count += 1
+        pooled.close()
@@ -1,43 +1,296 @@
-from mariadb import connect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+from mariadb import connect, InterfaceError, OperationalError
 from mariadb.connections import Connection
+from data.connection_pool import ConnectionPool, PooledConnection
+from data.routing import ReadRouter
+from data.settings import DatabaseEndpoint, DatabaseSettings
+
+
+settings = DatabaseSettings.load()
+
+# Client errors meaning the server could not be reached or the connection dropped. Only these are
+# retried, a failing or timed out statement is not.
+RETRYABLE_ERRNOS = {2002, 2003, 2006, 2013}
+
+
+def _is_retryable(error: Exception) -> bool:
+    return getattr(error, "errno", None) in RETRYABLE_ERRNOS
+
+
+def _connect_options(endpoint: DatabaseEndpoint) -> dict:
+    options = {
+        "user": settings.user,
+        "password": settings.password,
+        "host": endpoint.host,
+        "port": endpoint.port,
+        "database": settings.name,
+        "connect_timeout": settings.connect_timeout_seconds,
+    }
+    if settings.read_timeout_seconds is not None:
+        options["read_timeout"] = settings.read_timeout_seconds
+    if settings.write_timeout_seconds is not None:
+        options["write_timeout"] = settings.write_timeout_seconds
+    if settings.statement_timeout_seconds is not None:
+        options["init_command"] = f"set session max_statement_time = {settings.statement_timeout_seconds}"
+    if settings.ssl:
+        options.update(ssl=True, ssl_ca=settings.ssl_ca, ssl_cert=settings.ssl_cert, ssl_key=settings.ssl_key,
+                       ssl_verify_cert=settings.ssl_verify_cert)
+    return options
+
+
+def _connect(endpoint: DatabaseEndpoint) -> Connection:
+    attempt = 0
+    while True:
+        try:
+            return connect(**_connect_options(endpoint))
+        except (InterfaceError, OperationalError) as error:
+            if attempt >= settings.connect_retries or not _is_retryable(error):
+                raise
+            time.sleep(settings.retry_backoff_seconds * 2 ** attempt)
+            attempt += 1
 
 
 def get_connection() -> Connection:
-    return connect(
-        user="root",
-        password="6527",
-        host="localhost",
-        port=3306,
-        database="learning_platform"
+    return _connect(settings.primary)
+
+
+def _endpoint_connector(endpoint: DatabaseEndpoint) -> Callable[[], Connection]:
+    return lambda: _connect(endpoint)
+
+
+def _create_pool(connect_to: Callable[[], Connection]) -> ConnectionPool:
+    return ConnectionPool(
+        connect_to,
+        min_size=settings.pool_min_size,
+        max_size=settings.pool_max_size,
+        idle_timeout=settings.pool_idle_timeout_seconds,
+        recycle_after=settings.pool_recycle_seconds,
+        borrow_timeout=settings.pool_borrow_timeout_seconds,
+        statement_cache_size=settings.statement_cache_size
     )
 
 
-def read_query(sql: str, sql_params=()):
-    with get_connection() as conn:
-        cursor = conn.cursor()
+pool = _create_pool(get_connection)
+replica_pools = {replica.name: _create_pool(_endpoint_connector(replica)) for replica in settings.replicas}
+read_router = ReadRouter(pool, list(replica_pools.values()), settings.read_strategy,
+                         in_use=lambda target: target.borrowed)
+
+def get_pool_stats() -> dict:
+    return {
+        "primary": pool.stats(),
+        "replicas": {endpoint: replica_pool.stats() for endpoint, replica_pool in replica_pools.items()},
+        "read_strategy": settings.read_strategy,
+    }
+
+
+class RequestSession:
+    """
+        One connection and one transaction shared by all queries of a single HTTP request.
+
+        Connections are borrowed lazily on the first query, so requests that never touch the
+        database do not hold one. Reads use a replica connection until the request touches the
+        primary (a write or a locking read) and the primary connection afterwards, so a request
+        always sees its own changes. Requests of a client that wrote recently are pinned to the
+        primary from the start (see `DatabaseSessionMiddleware`). The owner of the session decides
+        whether to commit or roll back.
+    """
+
+    def __init__(self, pinned_to_primary: bool = False):
+        self.pinned_to_primary = pinned_to_primary
+        self.wrote = False
+        self._after_commit: list[Callable[[], None]] = []
+        self._pooled: PooledConnection | None = None
+        self._replica_pool: ConnectionPool | None = None
+        self._replica: PooledConnection | None = None
+        self._broken = False
+
+    @property
+    def active(self) -> bool:
+        return self._pooled is not None or self._replica is not None
+
+    @property
+    def reads_from_primary(self) -> bool:
+        return self.pinned_to_primary or self._pooled is not None
+
+    @property
+    def connection(self) -> PooledConnection:
+        if self._pooled is None:
+            self._pooled = pool.acquire()
+        return self._pooled
+
+    @property
+    def read_connection(self) -> PooledConnection:
+        if self.reads_from_primary:
+            return self.connection
+        if self._replica is None:
+            self._replica_pool = read_router.choose()
+            self._replica = self._replica_pool.acquire()
+        return self._replica
+
+    def mark_broken(self):
+        self._broken = True
+
+    def after_commit(self, callback: Callable[[], None]):
+        self._after_commit.append(callback)
+
+    def commit(self):
+        if self._pooled is not None and not self._broken:
+            self._pooled.commit()
+            for callback in self._after_commit:
+                callback()
+
+    def rollback(self):
+        if self._pooled is not None and not self._broken:
+            self._pooled.rollback()
+
+    def close(self):
+        if self._replica is not None:
+            self._replica_pool.release(self._replica, discard=self._broken)
+            self._replica = None
+        if self._pooled is not None:
+            pool.release(self._pooled, discard=self._broken)
+            self._pooled = None
+
+
+_current_session: ContextVar[RequestSession | None] = ContextVar("current_session", default=None)
+
+
+def begin_session(pinned_to_primary: bool = False) -> RequestSession:
+    session = RequestSession(pinned_to_primary)
+    _current_session.set(session)
+    return session
+
+
+def end_session():
+    _current_session.set(None)
+
+
+def get_db_session() -> RequestSession | None:
+    return _current_session.get()
+
+
+def after_commit(callback: Callable[[], None]):
+    """
+        Call `callback` once the writes made so far are committed: when the request session
+        commits, or right away outside a session, where every write commits on its own. Dropped if
+        the session rolls back.
+    """
+    session = _current_session.get()
+    if session is None:
+        callback()
+    else:
+        session.after_commit(callback)
+
+
+@contextmanager
+def standalone():
+    """
+        Run the queries of the block outside the request session: each on its own pooled connection
+        and, for writes, in its own committed transaction. For housekeeping that must not hold locks
+        in, be rolled back with, or pin the client of an unrelated request.
+    """
+    token = _current_session.set(None)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+@contextmanager
+def _connection(write: bool, primary: bool = False):
+    session = _current_session.get()
+    if session is None:
+        target = pool if write or primary else read_router.choose()
+        with target.connection() as conn:
+            yield conn
+            if write:
+                conn.commit()
+        return
+
+    try:
+        if write:
+            session.wrote = True
+        yield session.connection if write or primary else session.read_connection
+    except (InterfaceError, OperationalError):
+        session.mark_broken()
+        raise
+
+
+def read_query(sql: str, sql_params=(), primary: bool = False):
+    attempt = 0
+    while True:
+        try:
+            with _connection(write=False, primary=primary) as conn:
+                cursor = conn.prepared_cursor(sql)
+                cursor.execute(sql, sql_params)
+                return list(cursor)
+        except (InterfaceError, OperationalError) as error:
+            # Inside a request session the transaction is lost with the connection, so only
+            # standalone reads are retried.
+            if get_db_session() is not None or attempt >= settings.read_retries or not _is_retryable(error):
+                raise
+            time.sleep(settings.retry_backoff_seconds * 2 ** attempt)
+            attempt += 1
+
+
+def stream_query(sql: str, sql_params=(), batch_size: int | None = None) -> Iterator[tuple]:
+    """
+        Like `read_query`, but yields the rows while they arrive instead of returning a list.
+
+        The rows come from an unbuffered cursor in batches of `batch_size`, so memory use does not
+        depend on the size of the result. The query runs on its own pooled connection rather than on
+        the request session, because the rows are usually consumed while the response is being sent,
+        after the session has ended. The connection is returned to the pool once the iterator is
+        exhausted or closed.
+    """
+    session = _current_session.get()
+    target = pool if session is not None and session.reads_from_primary else read_router.choose()
+    return _stream_rows(target, sql, sql_params, batch_size or settings.stream_batch_size)
+
+
+def _stream_rows(target: ConnectionPool, sql: str, sql_params, batch_size: int) -> Iterator[tuple]:
+    pooled = target.acquire()
+    discard = False
+    cursor = None
+    try:
+        cursor = pooled.cursor(buffered=False)
         cursor.execute(sql, sql_params)
-        return list(cursor)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    except (InterfaceError, OperationalError):
+        discard = True
+        raise
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except (InterfaceError, OperationalError):
+                discard = True
+        target.release(pooled, discard=discard)
 
 
 def insert_query(sql: str, sql_params=()):
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    with _connection(write=True) as conn:
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, sql_params)
-        conn.commit()
         return cursor.lastrowid
 
 
 def update_query(sql: str, sql_params=()):
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    with _connection(write=True) as conn:
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, sql_params)
-        conn.commit()
         return cursor.rowcount
 
 
 def delete_query(sql: str, sql_params=()):
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    with _connection(write=True) as conn:
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, sql_params)
-        conn.commit()
-        return cursor.rowcount
+        return cursor.rowcount
\ No newline at end of file
@@ -1,5 +1,7 @@
+from datetime import datetime
 from pydantic import BaseModel, constr, Field, EmailStr
 from typing import Optional, List, Dict
+from common.constants import MIN_RATING, MAX_RATING
 
 
 class Section(BaseModel):
@@ -69,6 +71,66 @@ class Course(BaseModel):
         )
 
 
+class StudentCourse(Course):
+    enrolled: bool = Field(False, title="Is the Student Enrolled", example=True)
+
+    @classmethod
+    def from_query_result(cls, course_id, title, description, objectives, owner_id, is_premium, rating, enrolled):
+        return cls(
+            course_id=course_id,
+            title=title,
+            description=description,
+            objectives=objectives,
+            owner_id=owner_id,
+            is_premium=is_premium,
+            rating=rating,
+            enrolled=enrolled
+        )
+
+
+class CourseSearchResult(BaseModel):
+    course_id: int
+    title: str = Field(..., title="Course Title", example="English A1")
+    description: str = Field(..., title="Course Description",
+                             example="Introductory course covering the alphabet, common grammar points and basic words")
+    is_premium: bool = Field(False, title="Is Premium", example=False)
+    rating: float = Field(0.00, title="Course Rating (1-5)", example=4.5)
+    tags: List[str] = Field([], title="Course Tags", example=["english", "beginner"])
+    score: float = Field(0.0, title="Relevance Score", example=7.31)
+
+
+class TopRatedCourse(BaseModel):
+    course_id: int
+    title: str = Field(..., title="Course Title", example="English A1")
+    description: str = Field(..., title="Course Description",
+                             example="Introductory course covering the alphabet, common grammar points and basic words")
+    is_premium: bool = Field(False, title="Is Premium", example=False)
+    rating: float = Field(0.00, title="Average Rating (1-5)", example=4.5)
+    rating_count: int = Field(0, title="Number of Ratings", example=12)
+
+    @classmethod
+    def from_query_result(cls, course_id, title, description, is_premium, rating, rating_count):
+        return cls(
+            course_id=course_id,
+            title=title,
+            description=description,
+            is_premium=is_premium,
+            rating=rating,
+            rating_count=rating_count
+        )
+
+
+class RateCourse(BaseModel):
+    rating: int = Field(..., ge=MIN_RATING, le=MAX_RATING, title="Rating (1-5)", example=5)
+
+
+class CourseRating(BaseModel):
+    course_id: int
+    rating: int = Field(..., title="The Student's Rating (1-5)", example=5)
+    average_rating: float = Field(..., title="Average Rating (1-5)", example=4.5)
+    rating_count: int = Field(..., title="Number of Ratings", example=12)
+
+
 class CreateCourse(BaseModel):
     title: str = Field(...,title="Course Title", example="B2 - English")
     description: str = Field(..., title="Course Description",
@@ -96,6 +158,7 @@ class CourseWithSections(BaseModel):
                             example="Learn to understand and use very common everyday expressions and simple phrases for immediate needs.")
     owner_id: int = Field(..., title="Owner ID", example=1)
     is_premium: bool = Field(False, title="Is Premium", example=False)
+    revision: int = Field(0, title="Course Revision", example=3)
     sections: List[Optional[Section]] = Field(..., title="Course Sections")
 
 
@@ -181,6 +244,12 @@ class Student(BaseModel):
         )
 
 
+class Principal(BaseModel):
+    user: User
+    teacher: Optional[Teacher] = None
+    student: Optional[Student] = None
+
+
 class StudentRegistration(BaseModel):
     email: EmailStr = Field(..., title="Email Address", example="p.ivanov@gmail.com")
     first_name: str = Field(..., title="First Name", example="Pavel")
@@ -195,15 +264,17 @@ class StudentReport(BaseModel):
     email: EmailStr = Field(..., title="Email Address", example="p.ivanov@gmail.com")
     course_id: int
     course_title: str = Field(..., title="Course Title", example="Beginner Level - English")
+    enrolled_at: Optional[datetime] = Field(None, title="Enrolled At", example="2024-03-01T09:30:00")
 
     @classmethod
-    def from_query_result(cls, student_id, first_name, last_name, email, course_id, course_title):
+    def from_query_result(cls, student_id, first_name, last_name, email, course_id, course_title, enrolled_at=None):
         return cls(student_id=student_id,
                    first_name=first_name,
                    last_name=last_name,
                    email=email,
                    course_id=course_id,
-                   course_title=course_title)
+                   course_title=course_title,
+                   enrolled_at=enrolled_at)
 
 
 class GetUser(BaseModel):
@@ -0,0 +1,41 @@
+import itertools
+from typing import Callable, Generic, TypeVar
+
+
+Target = TypeVar("Target")
+
+READ_STRATEGIES = ("round_robin", "least_connections")
+
+
+class ReadRouter(Generic[Target]):
+    """
+        Chooses where a read query is sent.
+
+        `round_robin` cycles through the replicas, `least_connections` picks the replica with the
+        fewest connections in use (ties are broken round-robin). Without replicas every read goes to
+        the primary.
+    """
+
+    def __init__(self, primary: Target, replicas: list[Target], strategy: str = "round_robin",
+                 in_use: Callable[[Target], int] | None = None):
+        if strategy not in READ_STRATEGIES:
+            raise ValueError(f"Unknown read strategy '{strategy}', expected one of {', '.join(READ_STRATEGIES)}")
+        if strategy == "least_connections" and in_use is None:
+            raise ValueError("The least_connections strategy needs an in_use function")
+
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self._in_use = in_use
+        self._counter = itertools.count()
+
+    def choose(self) -> Target:
+        if not self.replicas:
+            return self.primary
+
+        start = next(self._counter) % len(self.replicas)
+        if self.strategy == "round_robin":
+            return self.replicas[start]
+
+        rotated = self.replicas[start:] + self.replicas[:start]
+        return min(rotated, key=self._in_use)
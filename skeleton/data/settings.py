@@ -0,0 +1,133 @@
+import json
+import os
+from ssl import CERT_NONE, SSLContext, create_default_context
+from typing import List, Optional
+
+from pydantic import BaseModel, validator
+
+from data.routing import READ_STRATEGIES
+
+
+SETTINGS_ENV_PREFIX = "POODLE_DB_"
+SETTINGS_FILE_ENV = "POODLE_DB_SETTINGS_FILE"
+
+
+class DatabaseEndpoint(BaseModel):
+    host: str
+    port: int = 3306
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class DatabaseSettings(BaseModel):
+    """
+        Connection targets, pool sizing, timeouts, TLS and retry policy of the database layer.
+
+        Every field can be set in a JSON file named by POODLE_DB_SETTINGS_FILE and overridden by an
+        environment variable named after the field, e.g. POODLE_DB_POOL_MAX_SIZE=40. Replicas are
+        given as "host1:3306,host2:3306" in the environment and as a list of {"host", "port"}
+        objects in the file.
+    """
+
+    user: str = "root"
+    password: str = "6527"
+    host: str = "localhost"
+    port: int = 3306
+    name: str = "learning_platform"
+
+    replicas: List[DatabaseEndpoint] = []
+    read_strategy: str = "round_robin"
+    read_your_writes_seconds: float = 5
+
+    pool_min_size: int = 2
+    pool_max_size: int = 20
+    pool_idle_timeout_seconds: float = 300
+    pool_recycle_seconds: float = 3600
+    pool_borrow_timeout_seconds: float = 10
+    statement_cache_size: int = 64
+    stream_batch_size: int = 500
+
+    connect_timeout_seconds: int = 5
+    read_timeout_seconds: Optional[int] = None
+    write_timeout_seconds: Optional[int] = None
+    statement_timeout_seconds: Optional[float] = None
+
+    ssl: bool = False
+    ssl_ca: Optional[str] = None
+    ssl_cert: Optional[str] = None
+    ssl_key: Optional[str] = None
+    ssl_verify_cert: bool = True
+
+    connect_retries: int = 2
+    read_retries: int = 1
+    retry_backoff_seconds: float = 0.2
+
+    @validator("replicas", pre=True)
+    def parse_replicas(cls, value):
+        if not isinstance(value, str):
+            return value
+
+        replicas = []
+        for item in value.split(","):
+            host, _, port = item.strip().partition(":")
+            if host:
+                replicas.append({"host": host, "port": port or 3306})
+        return replicas
+
+    @validator("read_strategy")
+    def check_read_strategy(cls, value):
+        if value not in READ_STRATEGIES:
+            raise ValueError(f"expected one of {', '.join(READ_STRATEGIES)}")
+        return value
+
+    @validator("pool_min_size", "statement_cache_size", "connect_retries", "read_retries")
+    def check_not_negative(cls, value):
+        if value < 0:
+            raise ValueError("must not be negative")
+        return value
+
+    @validator("pool_max_size", "stream_batch_size")
+    def check_positive(cls, value):
+        if value < 1:
+            raise ValueError("must be at least 1")
+        return value
+
+    @validator("pool_max_size", always=True)
+    def check_pool_sizes(cls, value, values):
+        if "pool_min_size" in values and values["pool_min_size"] > value:
+            raise ValueError("must not be less than pool_min_size")
+        return value
+
+    @property
+    def primary(self) -> DatabaseEndpoint:
+        return DatabaseEndpoint(host=self.host, port=self.port)
+
+    def ssl_context(self) -> Optional[SSLContext]:
+        if not self.ssl:
+            return None
+
+        context = create_default_context(cafile=self.ssl_ca)
+        if self.ssl_cert:
+            context.load_cert_chain(self.ssl_cert, self.ssl_key)
+        if not self.ssl_verify_cert:
+            context.check_hostname = False
+            context.verify_mode = CERT_NONE
+        return context
+
+    @classmethod
+    def load(cls, environ=os.environ) -> "DatabaseSettings":
+        values = {}
+
+        settings_file = environ.get(SETTINGS_FILE_ENV)
+        if settings_file:
+            with open(settings_file) as file:
+                values.update(json.load(file))
+
+        for field in cls.__fields__:
+            value = environ.get(SETTINGS_ENV_PREFIX + field.upper())
+            if value is not None:
+                values[field] = value
+
+        return cls(**values)
@@ -5,11 +5,34 @@ from routers.sections import sections_router
 from routers.enrollments import enrollments_router
 from routers.tags import tags_router
 from routers.words import words_router
+from routers.metrics import metrics_router
+from common.middleware import DatabaseSessionMiddleware
+from common.passwords import PasswordHashingBusy
+from common.responses import ServiceUnavailable
+from data import async_database
+from services.search_service import course_search
+from services.users_service import signing_keys
 
 
 app = FastAPI()
+app.add_middleware(DatabaseSessionMiddleware, secret=signing_keys.current_key)
 
-routers = [users_router, courses_router, sections_router, enrollments_router, tags_router] #words_router]
+routers = [users_router, courses_router, sections_router, enrollments_router, tags_router, metrics_router] #words_router]
 
 for router in routers:
     app.include_router(router)
+
+
+@app.on_event("startup")
+async def build_course_search_index():
+    await course_search.refresh()
+
+
+@app.on_event("shutdown")
+async def close_async_database_pool():
+    await async_database.close_pool()
+
+
+@app.exception_handler(PasswordHashingBusy)
+def password_hashing_busy_handler(request, exc):
+    return ServiceUnavailable(content="Too many registrations or logins at the moment, please try again!")
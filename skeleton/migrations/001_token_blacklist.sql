@@ -0,0 +1,12 @@
+-- -----------------------------------------------------
+-- Table `learning_platform`.`token_blacklist`
+-- Fingerprints (SHA-256) of logged out tokens, kept until the token expires.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`token_blacklist` (
+  `id` INT(11) NOT NULL AUTO_INCREMENT,
+  `token_hash` CHAR(64) NOT NULL,
+  `expires_at` DATETIME NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE INDEX `token_hash_UNIQUE` (`token_hash` ASC) VISIBLE,
+  INDEX `expires_at_idx` (`expires_at` ASC) VISIBLE)
+ENGINE = InnoDB;
@@ -0,0 +1,5 @@
+-- -----------------------------------------------------
+-- Passwords are stored as bcrypt hashes (60 characters), which do not fit in VARCHAR(45).
+-- -----------------------------------------------------
+ALTER TABLE `learning_platform`.`users`
+  MODIFY COLUMN `password` VARCHAR(255) NOT NULL;
@@ -0,0 +1,7 @@
+-- -----------------------------------------------------
+-- Enrollment time, used to filter the teacher student report. Existing enrollments get the time of
+-- the migration.
+-- -----------------------------------------------------
+ALTER TABLE `learning_platform`.`enrollments`
+  ADD COLUMN `enrolled_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  ADD INDEX `courses_course_id_enrolled_at_idx` (`courses_course_id` ASC, `enrolled_at` ASC);
@@ -0,0 +1,6 @@
+-- -----------------------------------------------------
+-- Lets the student catalogue read public courses as an index range in course ID order instead of
+-- scanning all courses.
+-- -----------------------------------------------------
+ALTER TABLE `learning_platform`.`courses`
+  ADD INDEX `is_premium_course_id_idx` (`is_premium` ASC, `course_id` ASC);
@@ -0,0 +1,12 @@
+-- -----------------------------------------------------
+-- Table `learning_platform`.`catalogue_version`
+-- A single counter bumped by every course and tag change. Workers compare it to invalidate their
+-- cached public catalogue responses.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`catalogue_version` (
+  `id` TINYINT(4) NOT NULL,
+  `version` BIGINT(20) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id`))
+ENGINE = InnoDB;
+
+INSERT IGNORE INTO `learning_platform`.`catalogue_version` (`id`, `version`) VALUES (1, 0);
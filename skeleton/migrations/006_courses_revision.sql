@@ -0,0 +1,6 @@
+-- -----------------------------------------------------
+-- Revision of a course and its sections, bumped by every change to either. Used as the ETag of
+-- course reads.
+-- -----------------------------------------------------
+ALTER TABLE `learning_platform`.`courses`
+  ADD COLUMN `revision` INT(11) NOT NULL DEFAULT 0;
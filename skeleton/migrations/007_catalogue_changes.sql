@@ -0,0 +1,12 @@
+-- -----------------------------------------------------
+-- Table `learning_platform`.`catalogue_changes`
+-- One row per course whose catalogue data (text, tags, premium flag, rating) changed. Workers pull
+-- new rows to update their in-process course search index. Rows older than a day are purged.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`catalogue_changes` (
+  `id` BIGINT(20) NOT NULL AUTO_INCREMENT,
+  `course_id` INT(11) NOT NULL,
+  `changed_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  INDEX `changed_at` (`changed_at` ASC) VISIBLE)
+ENGINE = InnoDB;
@@ -0,0 +1,26 @@
+-- -----------------------------------------------------
+-- Table `learning_platform`.`course_ratings`
+-- One rating (1-5) per enrolled student and course. `courses` keeps the running sum and count of
+-- its ratings and their average in `rating`, updated in the same transaction as every rating.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `learning_platform`.`course_ratings` (
+  `student_id` INT(11) NOT NULL,
+  `course_id` INT(11) NOT NULL,
+  `rating` TINYINT(4) NOT NULL,
+  `rated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`student_id`, `course_id`),
+  INDEX `course_id` (`course_id` ASC) VISIBLE,
+  CONSTRAINT `course_ratings_ibfk_1`
+    FOREIGN KEY (`student_id`)
+    REFERENCES `learning_platform`.`students` (`student_id`),
+  CONSTRAINT `course_ratings_ibfk_2`
+    FOREIGN KEY (`course_id`)
+    REFERENCES `learning_platform`.`courses` (`course_id`))
+ENGINE = InnoDB;
+
+ALTER TABLE `learning_platform`.`courses`
+  ADD COLUMN `rating_sum` INT(11) NOT NULL DEFAULT 0,
+  ADD COLUMN `rating_count` INT(11) NOT NULL DEFAULT 0,
+  ADD INDEX `rating_course_id_idx` (`rating` ASC, `course_id` ASC) VISIBLE;
+
+UPDATE `learning_platform`.`courses` SET `rating` = 0.00 WHERE `rating_count` = 0;
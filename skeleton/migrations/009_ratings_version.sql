@@ -0,0 +1,6 @@
+-- -----------------------------------------------------
+-- A second counter in `catalogue_version`, bumped by every course rating. Only cached responses
+-- that show ratings (top-rated courses) compare it, so a rating leaves the rest of the cached
+-- public catalogue valid.
+-- -----------------------------------------------------
+INSERT IGNORE INTO `learning_platform`.`catalogue_version` (`id`, `version`) VALUES (2, 0);
@@ -1,82 +1,92 @@
-from fastapi import APIRouter, Header
-from data.models import CreateCourse, UpdateCourse
-from common.responses import BadRequest, Unauthorized, Forbidden, NotFound, Conflict
-from services import courses_service, users_service
-from common.authentication import get_user_or_raise_401
-from common.constants import USER_LOGGED_OUT_RESPONSE
-from services.tag_services import get_all_courses_with_tags
+from typing import List
+from fastapi import APIRouter, Depends, Header, Query, Response
+from data.models import CreateCourse, UpdateCourse, Teacher, Student, RateCourse
+from common.responses import BadRequest, Unauthorized, Forbidden, NotFound, Conflict, NotModified
+from common.etags import course_etag, etag_matches
+from services import courses_service, enrollments_service, ratings_service, search_service
+from common.authentication import current_teacher, current_student
+from common.pagination import PageRequest, paginated
+from common.catalogue_cache import catalogue_cache, ratings_cache
+from services.tag_services import CATALOGUE_SORTS, get_all_courses_with_tags
 
 
 courses_router = APIRouter(prefix="/courses")
 
 
 @courses_router.get("/teachers", tags=["Courses"])
-def get_all_teacher_courses(token: str = Header()):
+async def get_all_teacher_courses(title: str = None,
+                                  page: PageRequest = Depends(paginated(courses_service.TEACHER_COURSE_SORTS, "id")),
+                                  teacher: Teacher = Depends(current_teacher)):
     """
-        Retrieve all courses created by the logged-in teacher.
+        Retrieve a page of the courses created by the logged-in teacher.
 
         Parameters:
+        - title: str, optional
+            Return only courses whose title contains this text.
+        - cursor: str, optional
+            The `next` value of the previous page.
+        - limit: int, optional
+            The maximum number of courses in the page (default is 50, at most 100).
+        - sort: str, optional
+            "id" (default) or "title".
+        - order: str, optional
+            "asc" (default) or "desc".
         - token: str
             The JWT token provided in the header.
 
         Returns:
-        - List: A list of courses created by the teacher.
+        - Page: {"items": courses created by the teacher, "next": cursor of the next page or null}.
         - Unauthorized: If the token is blacklisted.
         - Forbidden: If the user is not a teacher.
         - NotFound: If the teacher has not created any courses.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User must be a teacher in order to view all courses!")
-
-    courses = courses_service.get_all_teacher_courses(teacher.teacher_id)
-    if not courses:
+    courses = await courses_service.get_all_teacher_courses(teacher.teacher_id, page, title)
+    if not courses.items and page.after is None:
         return NotFound(content=f"Teacher with id:{teacher.teacher_id} has not created any courses yet")
 
     return courses
 
 
 @courses_router.get("/students", tags=["Courses"])
-def get_all_student_courses(token: str = Header()):
+async def get_all_student_courses(page: PageRequest = Depends(paginated(courses_service.STUDENT_COURSE_SORTS, "id")),
+                                  student: Student = Depends(current_student)):
     """
-        Retrieve all courses the logged-in student is enrolled in.
+        Retrieve a page of the courses available to the logged-in student: the courses the student
+        is enrolled in and all public courses.
 
         Parameters:
+        - cursor: str, optional
+            The `next` value of the previous page.
+        - limit: int, optional
+            The maximum number of courses in the page (default is 50, at most 100).
+        - order: str, optional
+            "asc" (default) or "desc" by course ID.
         - token: str
             The JWT token provided in the header.
 
         Returns:
-        - List: A list of courses the student is enrolled in.
+        - Page: {"items": courses available to the student, each with an `enrolled` flag, "next": cursor
+          of the next page or null}.
         - Unauthorized: If the token is blacklisted.
         - Forbidden: If the user is not a student.
         - NotFound: If the student is not enrolled in any courses.
         """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    student = users_service.get_student_by_user_id(user.user_id)
-    if not student:
-        return Forbidden(content="User must be a student to access enrolled courses!")
-
-    courses = courses_service.get_all_student_courses(student.student_id)
-    if not courses:
+    courses = await courses_service.get_all_student_courses(student.student_id, page)
+    if not courses.items and page.after is None:
         return NotFound(content="Student is not enrolled in any courses yet!")
 
     return courses
 
 
 @courses_router.get("/{course_id}/teachers", tags=["Courses"])
-def get_teacher_course_by_id(course_id: int, order: str = "asc", title: str = None, token: str = Header()):
+async def get_teacher_course_by_id(course_id: int, response: Response, order: str = "asc", title: str = None,
+                                   if_none_match: str = Header(None), teacher: Teacher = Depends(current_teacher)):
     """
         Retrieve a specific course created by the logged-in teacher.
 
+        The response carries an ETag. A request whose If-None-Match header matches the current ETag
+        is answered with 304 Not Modified without loading the sections.
+
         Parameters:
         - course_id: int
             The ID of the course to retrieve.
@@ -84,39 +94,45 @@ def get_teacher_course_by_id(course_id: int, order: str = "asc", title: str = No
             The order in which to retrieve the sections in the course (default is "asc").
         - title: str, optional
             The title filter for the sections in the course (default is None).
+        - If-None-Match: str, optional
+            The ETag of a previously received copy of the course.
         - token: str
             The JWT token provided in the header.
 
         Returns:
         - Course: The course with the specified ID.
+        - NotModified: If the course has not changed since the copy identified by If-None-Match.
         - Unauthorized: If the token is blacklisted.
         - Forbidden: If the user is not a teacher or not the owner of the course.
         - NotFound: If the course is not found.
     """
-    user = get_user_or_raise_401(token)
+    variant = (order.lower() == "desc", title)
 
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
+    if if_none_match:
+        revision = await courses_service.get_teacher_course_revision(teacher.teacher_id, course_id)
+        if revision is not None and etag_matches(if_none_match, course_etag(course_id, revision, *variant)):
+            return NotModified(course_etag(course_id, revision, *variant))
 
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User must be a teacher in order to view all courses!")
-
-    course = courses_service.get_teacher_course_by_id(teacher.teacher_id, course_id, order, title)
+    course = await courses_service.get_teacher_course_by_id(teacher.teacher_id, course_id, order, title)
     if not course:
         return NotFound(content=f"Course with id {course_id} not found!")
 
     if teacher.teacher_id != course.owner_id:
         return Forbidden(content=f"Teacher must be owner of course with id: {course.course_id} in order to view it!")
 
+    response.headers["ETag"] = course_etag(course_id, course.revision, *variant)
     return course
 
 
 @courses_router.get("/{course_id}/students", tags=["Courses"])
-def get_student_course_by_id(course_id: int, order: str = "asc", title: str = None, token: str = Header()):
+async def get_student_course_by_id(course_id: int, response: Response, order: str = "asc", title: str = None,
+                                   if_none_match: str = Header(None), student: Student = Depends(current_student)):
     """
         Retrieve a specific course the logged-in student is enrolled in.
 
+        The response carries an ETag. A request whose If-None-Match header matches the current ETag
+        is answered with 304 Not Modified without loading the sections.
+
         Parameters:
         - course_id: int
             The ID of the course to retrieve.
@@ -124,38 +140,39 @@ def get_student_course_by_id(course_id: int, order: str = "asc", title: str = No
             The order in which to retrieve the sections in the course (default is "asc").
         - title: str, optional
             The title filter for the sections in the course (default is None).
+        - If-None-Match: str, optional
+            The ETag of a previously received copy of the course.
         - token: str
             The JWT token provided in the header.
 
         Returns:
         - Course: The course with the specified ID.
+        - NotModified: If the course has not changed since the copy identified by If-None-Match.
         - Unauthorized: If the token is blacklisted.
-        - Forbidden: If the user is not a student.
+        - Forbidden: If the user is not a student, or the course is premium and the student is not
+          enrolled in it.
         - NotFound: If the course is not found.
         """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
+    variant = (order.lower() == "desc", title)
 
-    student = users_service.get_student_by_user_id(user.user_id)
-    if not student:
-        return Forbidden(content="User must be a student in order to view a specific course with its sections!")
+    if if_none_match:
+        revision = await courses_service.get_student_course_revision(student.student_id, course_id)
+        if revision is not None and etag_matches(if_none_match, course_etag(course_id, revision, *variant)):
+            return NotModified(course_etag(course_id, revision, *variant))
 
-    course = courses_service.get_student_course_by_id(student.student_id, course_id, order, title)
+    course = await courses_service.get_student_course_by_id(student.student_id, course_id, order, title)
     if not course:
         return NotFound(f"Course with id:{course_id} not found!")
 
-    is_enrolled = courses_service.is_student_enrolled_in_course(student.student_id, course.course_id)
-
-    if not is_enrolled and course.is_premium:
-        return Forbidden(content="Access denied. This is a premium course and the student is not enrolled.")
+    if isinstance(course, Forbidden):
+        return course
 
+    response.headers["ETag"] = course_etag(course_id, course.revision, *variant)
     return course
 
 
 @courses_router.post("/", tags=["Courses"])
-def create_course(data: CreateCourse, token: str = Header()):
+def create_course(data: CreateCourse, teacher: Teacher = Depends(current_teacher)):
     """
         Create a new course.
 
@@ -171,15 +188,6 @@ def create_course(data: CreateCourse, token: str = Header()):
         - Forbidden: If the user is not a teacher.
         - BadRequest: If the course title already exists or other error occurs.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User is not authorized to create a course!")
-
     course = courses_service.create_course(teacher.teacher_id, data)
     if not course:
         return BadRequest(content="Course with this title already exists or other error occurred")
@@ -188,7 +196,7 @@ def create_course(data: CreateCourse, token: str = Header()):
 
 
 @courses_router.put("/{course_id}", tags=["Courses"])
-def update_course_details(course_id: int, data: UpdateCourse, token: str = Header()):
+def update_course_details(course_id: int, data: UpdateCourse, teacher: Teacher = Depends(current_teacher)):
     """
         Update the details of an existing course.
 
@@ -206,21 +214,11 @@ def update_course_details(course_id: int, data: UpdateCourse, token: str = Heade
         - Forbidden: If the user is not the owner of the course.
         - NotFound: If the course is not found.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User is not authorized! Only teachers that are owners "
-                                 "can update a course!")
-
-    course = courses_service.get_teacher_course_by_id(teacher.teacher_id, course_id)
-    if not course:
+    course = courses_service.get_course_by_id_simpler(course_id)
+    if not course or course.owner_id != teacher.teacher_id:
         return NotFound(content=f"Course with ID {course_id} not found.")
 
-    updated_course = courses_service.update_course(course_id, data, user.user_id)
+    updated_course = courses_service.update_course(course_id, data, teacher.teacher_id)
 
     if not updated_course:
         return NotFound(content=f"Course with id: {course_id} not found")
@@ -231,7 +229,7 @@ def update_course_details(course_id: int, data: UpdateCourse, token: str = Heade
 
 
 @courses_router.delete("/{course_id}", tags=["Courses"])
-def delete_course(course_id: int, token: str = Header()):
+def delete_course(course_id: int, teacher: Teacher = Depends(current_teacher)):
     """
         Delete an existing course.
 
@@ -248,15 +246,6 @@ def delete_course(course_id: int, token: str = Header()):
         - Conflict: If the course is already deleted.
         - BadRequest: If the user is not the owner of the course or if deletion fails.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Unauthorized(content="User must be a teacher to delete a course!")
-
     course = courses_service.get_course_by_id_simpler(course_id)
     if not course:
         return NotFound(content=f"Course with id:{course_id} not found!")
@@ -281,13 +270,109 @@ def delete_course(course_id: int, token: str = Header()):
 
 
 @courses_router.get("/tags", tags=["Courses"])
-def get_all_courses_with_associated_tags():
+async def get_all_courses_with_associated_tags(page: PageRequest = Depends(paginated(CATALOGUE_SORTS, "id"))):
     """
-        Retrieve all courses along with their associated tags.
+        Retrieve a page of courses along with their associated tags. Served from the catalogue cache.
+
+        Parameters:
+        - cursor: str, optional
+            The `next` value of the previous page.
+        - limit: int, optional
+            The maximum number of courses in the page (default is 50, at most 100).
+        - order: str, optional
+            "asc" (default) or "desc" by course ID.
 
         Returns:
-        - List: A list of courses along with their tags.
+        - Page: {"items": courses along with their tags, "next": cursor of the next page or null}.
     """
-    result = get_all_courses_with_tags()
+    cache_key = ("courses_with_tags", page.sort, page.descending, tuple(page.after or ()), page.limit)
+    result = await catalogue_cache.response(cache_key, lambda: get_all_courses_with_tags(page))
     return result
 
+
+@courses_router.get("/search", tags=["Courses"])
+async def search_courses(q: str = Query(None, description="Words that must all appear in the course."),
+                         tag: List[str] = Query([], description="Tags the course must have; repeat for several."),
+                         min_rating: float = Query(None, ge=0, le=5),
+                         page: PageRequest = Depends(paginated(search_service.SEARCH_SORTS, "relevance", "desc"))):
+    """
+        Search the courses by title, description, objectives and tags.
+
+        Courses containing every word of `q` are ranked by relevance; a match in the title weighs
+        more than one in the tags, objectives or description. Served from an in-process index that
+        picks up course and tag changes within about a second.
+
+        Parameters:
+        - q: str, optional
+            The search words. Without them, every course passing the filters matches with score 0.
+        - tag: List[str], optional
+            Return only courses that have all of these tags (case-insensitive).
+        - min_rating: float, optional
+            Return only courses rated at least this much.
+        - cursor: str, optional
+            The `next` value of the previous page.
+        - limit: int, optional
+            The maximum number of courses in the page (default is 50, at most 100).
+        - sort: str, optional
+            "relevance" (default), "rating" or "id".
+        - order: str, optional
+            "desc" (default) or "asc".
+
+        Returns:
+        - Page: {"items": matching courses with their tags and score, "next": cursor of the next page or null}.
+    """
+    return await search_service.search_courses(q, tag, min_rating, page)
+
+
+@courses_router.get("/top-rated", tags=["Courses"])
+async def get_top_rated_courses(min_rating: float = Query(None, ge=0, le=5),
+                                page: PageRequest = Depends(paginated(ratings_service.TOP_RATED_SORTS, "rating",
+                                                                      "desc"))):
+    """
+        Retrieve a page of the rated courses, best rated first. Served from the ratings cache.
+
+        Parameters:
+        - min_rating: float, optional
+            Return only courses with at least this average rating.
+        - cursor: str, optional
+            The `next` value of the previous page.
+        - limit: int, optional
+            The maximum number of courses in the page (default is 50, at most 100).
+        - order: str, optional
+            "desc" (default) or "asc" by average rating.
+
+        Returns:
+        - Page: {"items": courses with their average rating and number of ratings, "next": cursor of the
+          next page or null}.
+    """
+    cache_key = ("top_rated_courses", min_rating, page.descending, tuple(page.after or ()), page.limit)
+    return await ratings_cache.response(cache_key, lambda: ratings_service.get_top_rated_courses(page, min_rating))
+
+
+@courses_router.post("/{course_id}/rating", tags=["Courses"])
+def rate_course(course_id: int, data: RateCourse, student: Student = Depends(current_student)):
+    """
+        Rate a course the logged-in student is enrolled in. Rating it again replaces the earlier rating.
+
+        Parameters:
+        - course_id: int
+            The ID of the course to rate.
+        - data: RateCourse
+            The rating, from 1 to 5.
+        - token: str
+            The JWT token provided in the header.
+
+        Returns:
+        - CourseRating: The student's rating and the new average rating of the course.
+        - Unauthorized: If the token is blacklisted.
+        - Forbidden: If the user is not a student or is not enrolled in the course.
+        - NotFound: If the course is not found.
+        - Conflict: If the rating collides with a concurrent rating and has to be retried.
+    """
+    if not courses_service.get_course_by_id_simpler(course_id):
+        return NotFound(content=f"Course with id:{course_id} not found!")
+
+    if not enrollments_service.is_student_enrolled(student.student_id, course_id):
+        return Forbidden(content="Only students enrolled in the course can rate it!")
+
+    return ratings_service.rate_course(student.student_id, course_id, data.rating)
@@ -1,46 +1,78 @@
-from fastapi import APIRouter, Header
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, Query
 from common.responses import BadRequest, Forbidden, NotFound, Conflict
-from services import users_service, enrollments_service, courses_service
-from common.authentication import get_user_or_raise_401
-from common.constants import PREMIUM_COURSE_LIMIT, USER_LOGGED_OUT_RESPONSE
+from data.models import Teacher, Student
+from services import enrollments_service, courses_service
+from common.authentication import current_teacher, current_student
+from common.constants import PREMIUM_COURSE_LIMIT
+from common.pagination import PageRequest, paginated
+from common.streaming import accepts_gzip, csv_response, ndjson_response, non_empty
 
 enrollments_router = APIRouter(prefix="/enrollments")
 
 
 @enrollments_router.get("/reports/students", tags=["Enrollments"])
-def get_teacher_students_report(token: str = Header()):
+def get_teacher_students_report(format: str = Query("json", regex="^(json|ndjson|csv)$"), course_id: int = None,
+                                enrolled_after: datetime = None, accept_encoding: str = Header(None),
+                                page: PageRequest = Depends(paginated(enrollments_service.STUDENT_REPORT_SORTS,
+                                                                      "course")),
+                                teacher: Teacher = Depends(current_teacher)):
     """
         Generate a report for a teacher about his students.
 
+        The JSON report is paginated. The NDJSON and CSV exports contain all students and are streamed
+        to the client while they are read from the database. They are gzip-compressed if the client
+        accepts it.
+
         Parameters:
+        - format: str, optional
+            "json" (default) for a page of students, "ndjson" for one JSON object per line or "csv" for
+            a spreadsheet download.
+        - course_id: int, optional
+            Only report the students of this course.
+        - enrolled_after: datetime, optional
+            Only report enrollments made after this time.
+        - cursor: str, optional
+            The `next` value of the previous page (JSON only).
+        - limit: int, optional
+            The maximum number of students in the page (JSON only, default is 50, at most 100).
+        - order: str, optional
+            "asc" (default) or "desc" by course and student ID (JSON only).
         - token: str
             The authentication token provided in the header.
 
         Returns:
-        - List of students: The students enrolled in the teacher's courses.
+        - Page: {"items": students enrolled in the teacher's courses, "next": cursor of the next page or
+          null} for JSON, all students for NDJSON and CSV.
         - Forbidden: If the user is not a teacher.
         - NotFound: If no students are found for the given teacher's courses.
         - Unauthorized: If the token is blacklisted.
     """
-    user = get_user_or_raise_401(token)
+    gzip = accepts_gzip(accept_encoding)
 
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
+    if format == "csv":
+        rows = non_empty(enrollments_service.stream_student_report_rows(teacher.teacher_id, course_id, enrolled_after))
+        if rows is None:
+            return NotFound(content="No students found for the given teacher's courses.")
+        return csv_response(enrollments_service.STUDENT_REPORT_COLUMNS, rows, "students_report.csv", gzip=gzip)
 
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User must be a teacher to generate student reports!")
+    if format == "ndjson":
+        enrolled_students = non_empty(
+            enrollments_service.get_students_by_teacher_id(teacher.teacher_id, course_id, enrolled_after))
+        if enrolled_students is None:
+            return NotFound(content="No students found for the given teacher's courses.")
+        return ndjson_response(enrolled_students, gzip=gzip)
 
-    enrolled_students = enrollments_service.get_students_by_teacher_id(teacher.teacher_id)
+    enrolled_students = enrollments_service.get_student_report_page(teacher.teacher_id, page, course_id, enrolled_after)
 
-    if not enrolled_students:
+    if not enrolled_students.items and page.after is None:
         return NotFound(content="No students found for the given teacher's courses.")
 
     return enrolled_students
 
 
 @enrollments_router.post("/courses/{course_id}/subscribe", tags=["Enrollments"])
-def subscribe_to_course(course_id: int, token: str = Header()):
+def subscribe_to_course(course_id: int, student: Student = Depends(current_student)):
     """
         Subscribe a student to a course.
 
@@ -57,19 +89,12 @@ def subscribe_to_course(course_id: int, token: str = Header()):
         - Conflict: If the student is already subscribed to the course or exceeds the premium course limit.
         - Unauthorized: If the token is blacklisted.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    student = users_service.get_student_by_user_id(user.user_id)
-    if not student:
-        return Forbidden(content="User must be a student to subscribe to courses!")
-
     course = courses_service.get_course_by_id_simpler(course_id)
     if not course:
         return NotFound(content=f"Course with id:{course_id} not found!")
 
+    enrollments_service.lock_student_enrollments(student.student_id)
+
     if enrollments_service.is_student_enrolled(student.student_id, course.course_id):
         return Conflict(content="Student is already subscribed to this course!")
 
@@ -84,7 +109,7 @@ def subscribe_to_course(course_id: int, token: str = Header()):
 
 
 @enrollments_router.post("/courses/{course_id}/unsubscribe", tags=["Enrollments"])
-def unsubscribe_from_course(course_id: int, token: str = Header()):
+def unsubscribe_from_course(course_id: int, student: Student = Depends(current_student)):
     """
         Unsubscribe a student from a course.
 
@@ -101,15 +126,6 @@ def unsubscribe_from_course(course_id: int, token: str = Header()):
         - Conflict: If the student is already not subscribed to the course.
         - Unauthorized: If the token is blacklisted.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    student = users_service.get_student_by_user_id(user.user_id)
-    if not student:
-        return Forbidden(content="User must be a student to subscribe to courses!")
-
     course = courses_service.get_course_by_id_simpler(course_id)
     if not course:
         return NotFound(content=f"Course with id:{course_id} not found!")
@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+from data.database import get_pool_stats
+from data import async_database
+from common.passwords import password_hasher
+from common.catalogue_cache import catalogue_cache, ratings_cache
+from services.search_service import course_search
+
+
+metrics_router = APIRouter(prefix="/metrics")
+
+
+@metrics_router.get("/database", tags=["Metrics"])
+def get_database_metrics():
+    """
+        Retrieve statistics of the database connection pools.
+
+        Returns:
+        - Dictionary: Pool size, borrowed and idle connections, borrow counts and wait times of the
+          sync pools, and size and idle connections of the async pools, for the primary and for
+          every replica.
+    """
+    return {"pool": get_pool_stats(), "async_pool": async_database.get_pool_stats()}
+
+
+@metrics_router.get("/password-hashing", tags=["Metrics"])
+def get_password_hashing_metrics():
+    """
+        Retrieve statistics of the password hashing pool.
+
+        Returns:
+        - Dictionary: Worker count, bcrypt cost factor, queue depth, completed and rejected operations.
+    """
+    return password_hasher.stats()
+
+
+@metrics_router.get("/catalogue-cache", tags=["Metrics"])
+def get_catalogue_cache_metrics():
+    """
+        Retrieve statistics of the public catalogue response cache.
+
+        Returns:
+        - Dictionary: Catalogue version seen by this worker, cached responses, hits and misses.
+    """
+    return catalogue_cache.stats()
+
+
+@metrics_router.get("/ratings-cache", tags=["Metrics"])
+def get_ratings_cache_metrics():
+    """
+        Retrieve statistics of the cache of responses that show course ratings (top-rated courses).
+
+        Returns:
+        - Dictionary: Catalogue and ratings versions seen by this worker, cached responses, hits and misses.
+    """
+    return ratings_cache.stats()
+
+
+@metrics_router.get("/search-index", tags=["Metrics"])
+def get_search_index_metrics():
+    """
+        Retrieve statistics of the course search index.
+
+        Returns:
+        - Dictionary: Indexed courses, last applied catalogue change and refresh intervals of this worker.
+    """
+    return course_search.stats()
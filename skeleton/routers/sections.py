@@ -1,16 +1,15 @@
-from fastapi import APIRouter, Header, HTTPException
-from data.models import Section, CreateSection, UpdateSection
+from fastapi import APIRouter, Depends, HTTPException
+from data.models import Section, CreateSection, UpdateSection, Teacher
 from common.responses import BadRequest, Unauthorized, Forbidden, NotFound
-from services import courses_service, users_service, sections_service
-from common.authentication import get_user_or_raise_401
-from common.constants import USER_LOGGED_OUT_RESPONSE
+from services import courses_service, sections_service
+from common.authentication import current_teacher
 
 
 sections_router = APIRouter(prefix="/sections")
 
 
 @sections_router.post("/", tags=["Sections"])
-def create_new_section(data: CreateSection, token: str = Header()):
+def create_new_section(data: CreateSection, teacher: Teacher = Depends(current_teacher)):
     """
         Create a new section within a course.
 
@@ -26,20 +25,11 @@ def create_new_section(data: CreateSection, token: str = Header()):
         - BadRequest: If section creation fails.
         - Unauthorized: If the token is blacklisted.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User must be a teacher in order to create a section within a course!")
-
-    course = courses_service.get_teacher_course_by_id(user.user_id, data.course_id)
+    course = courses_service.get_course_by_id_simpler(data.course_id)
     if not course:
         return NotFound(content=f"Course with ID {data.course_id} does not exist!")
 
-    if user.user_id != course.course_id:
+    if teacher.teacher_id != course.owner_id:
         return Forbidden(content=f"Teacher must be owner of course with id:{course.course_id} "
                                  f"in order to create a new section!")
 
@@ -52,7 +42,7 @@ def create_new_section(data: CreateSection, token: str = Header()):
 
 
 @sections_router.put("/{section_id}", tags=["Sections"])
-def update_section(section_id: int, data: UpdateSection, token: str = Header()):
+def update_section(section_id: int, data: UpdateSection, teacher: Teacher = Depends(current_teacher)):
     """
         Update an existing section.
 
@@ -70,16 +60,7 @@ def update_section(section_id: int, data: UpdateSection, token: str = Header()):
         - Forbidden: If the user is not the owner of the section.
         - Unauthorized: If the token is blacklisted.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User must be a teacher in order to update a section!")
-
-    if not sections_service.is_section_owner(section_id, user.user_id):
+    if not sections_service.is_section_owner(section_id, teacher.users_user_id):
         return Forbidden(content="Teacher must be the owner of the section to update it!")
 
     updated_section = sections_service.update_section(section_id, data)
@@ -91,7 +72,7 @@ def update_section(section_id: int, data: UpdateSection, token: str = Header()):
 
 
 @sections_router.delete("/{section_id}", tags=["Sections"])
-def delete_section(section_id: int, token: str = Header()):
+def delete_section(section_id: int, teacher: Teacher = Depends(current_teacher)):
     """
         Delete an existing section.
 
@@ -107,16 +88,7 @@ def delete_section(section_id: int, token: str = Header()):
         - Forbidden: If the user is not a teacher or not the owner of the section.
         - Unauthorized: If the token is blacklisted.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.get_teacher_by_user_id(user.user_id)
-    if not teacher:
-        return Forbidden(content="User must be a teacher in order to delete a section from a course!")
-
-    if not sections_service.is_section_owner(section_id, user.user_id):
+    if not sections_service.is_section_owner(section_id, teacher.users_user_id):
         return Forbidden(content="Teacher must be the owner of the section to delete it!")
 
     deleted_section = sections_service.delete_section(section_id)
@@ -1,18 +1,19 @@
-from fastapi import APIRouter, Header
-from common.authentication import get_user_or_raise_401
-from common.constants import USER_LOGGED_OUT_RESPONSE
-from services import users_service
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from common.authentication import current_teacher
+from common.pagination import PageRequest, paginated
 from services.tag_services import create_tag, delete_tag, add_tag_to_course, remove_tag_from_course, \
-    get_course_with_tags
+    get_course_with_tags, filter_courses_by_tags, CATALOGUE_SORTS
 from common.responses import Forbidden, BadRequest, NotFound
+from common.catalogue_cache import catalogue_cache
 from data.models import Tag, CreateTagRequest
 
 
 tags_router = APIRouter(prefix="/tags")
 
 
-@tags_router.post("/", response_model=Tag, tags=["Tags"])
-def create_new_tag(request: CreateTagRequest, token: str = Header()):
+@tags_router.post("/", response_model=Tag, tags=["Tags"], dependencies=[Depends(current_teacher)])
+def create_new_tag(request: CreateTagRequest):
     """
         Create a new tag.
 
@@ -27,14 +28,6 @@ def create_new_tag(request: CreateTagRequest, token: str = Header()):
         - Forbidden: If the user is not a teacher.
         - BadRequest: If the tag creation fails.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    if not users_service.is_teacher(user.user_id):
-        return Forbidden(content="Only teachers can create new tags!")
-
     tag = create_tag(request.tag_name)
     if isinstance(tag, BadRequest):
         return BadRequest(content="Can not create this tag!")
@@ -42,8 +35,8 @@ def create_new_tag(request: CreateTagRequest, token: str = Header()):
     return tag
 
 
-@tags_router.delete("/{tag_id}", tags=["Tags"])
-def remove_tag(tag_id: int, token: str = Header()):
+@tags_router.delete("/{tag_id}", tags=["Tags"], dependencies=[Depends(current_teacher)])
+def remove_tag(tag_id: int):
     """
         Remove an existing tag.
 
@@ -59,14 +52,6 @@ def remove_tag(tag_id: int, token: str = Header()):
         - Forbidden: If the user is not a teacher.
 
         """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    if not users_service.is_teacher(user.user_id):
-        return Forbidden(content="Only teachers can delete tags!")
-
     result = delete_tag(tag_id)
     if isinstance(result, NotFound):
         return NotFound(content="Tag not found!")
@@ -74,8 +59,8 @@ def remove_tag(tag_id: int, token: str = Header()):
     return result
 
 
-@tags_router.post("/{tag_id}/courses/{course_id}", tags=["Tags"])
-def add_tag_to_a_course(tag_id: int, course_id: int, token: str = Header()):
+@tags_router.post("/{tag_id}/courses/{course_id}", tags=["Tags"], dependencies=[Depends(current_teacher)])
+def add_tag_to_a_course(tag_id: int, course_id: int):
     """
         Add a tag to a course.
 
@@ -93,15 +78,6 @@ def add_tag_to_a_course(tag_id: int, course_id: int, token: str = Header()):
         - Forbidden: If the user is not a teacher.
         - BadRequest: If the operation fails.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.is_teacher(user.user_id)
-    if not teacher:
-        return Forbidden(content="Only teachers can add tags to courses!")
-
     result = add_tag_to_course(course_id, tag_id)
     if isinstance(result, NotFound):
         return NotFound(content="Course or tag not found!")
@@ -111,8 +87,8 @@ def add_tag_to_a_course(tag_id: int, course_id: int, token: str = Header()):
     return result
 
 
-@tags_router.delete("/{tag_id}/courses/{course_id}", tags=["Tags"])
-def remove_tag_from_its_course(tag_id: int, course_id: int, token: str = Header()):
+@tags_router.delete("/{tag_id}/courses/{course_id}", tags=["Tags"], dependencies=[Depends(current_teacher)])
+def remove_tag_from_its_course(tag_id: int, course_id: int):
     """
         Remove a tag from a course.
 
@@ -129,15 +105,6 @@ def remove_tag_from_its_course(tag_id: int, course_id: int, token: str = Header(
         - NotFound: If the course or tag is not found.
         - Forbidden: If the user is not a teacher.
     """
-    user = get_user_or_raise_401(token)
-
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    teacher = users_service.is_teacher(user.user_id)
-    if not teacher:
-        return Forbidden(content="Only teachers can remove tags from courses!")
-
     result = remove_tag_from_course(course_id, tag_id)
     if isinstance(result, NotFound):
         return NotFound(content="Course or tag not found!")
@@ -146,9 +113,9 @@ def remove_tag_from_its_course(tag_id: int, course_id: int, token: str = Header(
 
 
 @tags_router.get("/courses/{course_id}", tags=["Tags"])
-def get_course_with_its_tags(course_id: int):
+async def get_course_with_its_tags(course_id: int):
     """
-        Get a course with its associated tags.
+        Get a course with its associated tags. Served from the catalogue cache.
 
         Parameters:
         - course_id: int
@@ -159,8 +126,44 @@ def get_course_with_its_tags(course_id: int):
         - Dictionary: The course with its tags.
 
     """
-    result = get_course_with_tags(course_id)
+    result = await catalogue_cache.response(("course_with_tags", course_id), lambda: get_course_with_tags(course_id))
     if isinstance(result, NotFound):
         return NotFound(content="Course not found!")
 
     return result
+
+
+@tags_router.get("/filter", tags=["Tags"])
+async def filter_courses(tag: List[str] = Query([], description="Tags the course must all have (AND)."),
+                         any_tag: List[str] = Query([], description="Tags of which the course must have one (OR)."),
+                         not_tag: List[str] = Query([], description="Tags the course must not have (NOT)."),
+                         premium: bool = Query(None, description="Only premium (true) or only free (false) courses."),
+                         page: PageRequest = Depends(paginated(CATALOGUE_SORTS, "id"))):
+    """
+        Filter the courses by a combination of tags, with the number of matching courses per tag.
+
+        For example `?tag=python&tag=beginner&premium=false` returns the free courses tagged both
+        python and beginner. Tag names are case-insensitive. Served from in-process tag bitmaps that
+        pick up tag changes within about a second.
+
+        Parameters:
+        - tag: List[str], optional
+            The course must have all of these tags.
+        - any_tag: List[str], optional
+            The course must have at least one of these tags.
+        - not_tag: List[str], optional
+            The course must have none of these tags.
+        - premium: bool, optional
+            Only premium or only free courses.
+        - cursor: str, optional
+            The `next` value of the previous page.
+        - limit: int, optional
+            The maximum number of courses in the page (default is 50, at most 100).
+        - order: str, optional
+            "asc" (default) or "desc" by course ID.
+
+        Returns:
+        - Dictionary: {"items": matching courses with their tags, "next": cursor of the next page or null,
+          "count": number of matching courses, "facets": number of matching courses per tag}.
+    """
+    return await filter_courses_by_tags(tag, any_tag, not_tag, premium, page)
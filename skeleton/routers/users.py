@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Header
-from data.models import LoginInformation, TeacherRegistration, StudentRegistration
+from fastapi import APIRouter, Depends, Header
+from data.models import LoginInformation, TeacherRegistration, StudentRegistration, User, Teacher, Student
 from common.responses import BadRequest, Unauthorized, NotFound
 from services import users_service
-from common.constants import USER_LOGGED_OUT_RESPONSE
+from common.authentication import current_user, current_teacher, current_student
 
 users_router = APIRouter(prefix="/users")
 
 
 @users_router.post("/login", tags=["Users"])
-def user_login(data: LoginInformation):
+async def user_login(data: LoginInformation):
     """
         Log in a user and return a JWT token.
 
@@ -20,7 +20,7 @@ def user_login(data: LoginInformation):
         - Dictionary: A dictionary containing the JWT token if login is successful.
         - BadRequest: If the email or password is incorrect.
     """
-    user = users_service.try_login(data.email, data.password)
+    user = await users_service.try_login(data.email, data.password)
     if user:
         token = users_service.create_jwt_token(user.user_id, user.email)
         return {"token": token}
@@ -51,7 +51,7 @@ def user_logout(token: str = Header()):
 
 
 @users_router.get("/info", tags=["Users"])
-def user_info(token: str = Header()):
+async def user_info(user: User = Depends(current_user)):
     """
         Retrieve information about the logged-in user.
 
@@ -63,17 +63,11 @@ def user_info(token: str = Header()):
         - Dictionary: A dictionary containing the user's ID and email.
         - Unauthorized: If the token is invalid.
     """
-    payload = users_service.verify_jwt_token(token)
-    if payload:
-        user = users_service.get_by_id(payload["user_id"])
-        if user:
-            return {"id": user.user_id, "email": user.email}
-
-    return Unauthorized(content="Invalid token!")
+    return {"id": user.user_id, "email": user.email}
 
 
 @users_router.post("/register/teachers", tags=["Users"])
-def register_teacher(data: TeacherRegistration):
+async def register_teacher(data: TeacherRegistration):
     """
         Register a new teacher.
 
@@ -85,12 +79,12 @@ def register_teacher(data: TeacherRegistration):
         - Teacher: The created teacher object if successful.
         - BadRequest: If the email is already in use.
     """
-    user = users_service.create_teacher(data)
+    user = await users_service.create_teacher(data)
     return user if user else BadRequest(f'E-mail "{data.email}" is already in use!')
 
 
 @users_router.post("/register/students", tags=["Users"])
-def register_student(data: StudentRegistration):
+async def register_student(data: StudentRegistration):
     """
         Register a new student.
 
@@ -102,12 +96,12 @@ def register_student(data: StudentRegistration):
         - Student: The created student object if successful.
         - BadRequest: If the email is already in use.
     """
-    user = users_service.create_student(data)
+    user = await users_service.create_student(data)
     return user if user else BadRequest(content=f'E-mail "{data.email}" is already in use!')
 
 
 @users_router.get("/teachers/info", tags=["Users"])
-def get_teacher_info(token: str = Header()):
+async def get_teacher_info(teacher: Teacher = Depends(current_teacher)):
     """
         Retrieve information about the logged-in teacher.
 
@@ -117,23 +111,14 @@ def get_teacher_info(token: str = Header()):
 
         Returns:
         - Teacher: The teacher object if found.
-        - NotFound: If the teacher is not found.
+        - Forbidden: If the user is not a teacher.
         - Unauthorized: If the token is blacklisted.
     """
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    user = users_service.from_token(token)
-    if user:
-        teacher = users_service.get_teacher_by_user_id(user.user_id)
-        if teacher:
-            return teacher
-
-    return NotFound(content="Teacher not found!")
+    return teacher
 
 
 @users_router.put("/teachers/info", tags=["Users"])
-def update_teacher_info(data: dict, token: str = Header()):
+async def update_teacher_info(data: dict, teacher: Teacher = Depends(current_teacher)):
     """
         Update information about the logged-in teacher.
 
@@ -148,20 +133,15 @@ def update_teacher_info(data: dict, token: str = Header()):
         - BadRequest: If the update fails.
         - Unauthorized: If the token is blacklisted.
     """
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    user = users_service.from_token(token)
-    if user:
-        updated_teacher = users_service.update_teacher_info(user.user_id, data)
-        if updated_teacher:
-            return updated_teacher
+    updated_teacher = await users_service.update_teacher_info(teacher.users_user_id, data)
+    if updated_teacher:
+        return updated_teacher
 
     return BadRequest(content="Failed to update teacher information!")
 
 
 @users_router.put("/student/info", tags=["Users"])
-def update_student_info(data: dict, token: str = Header()):
+async def update_student_info(data: dict, student: Student = Depends(current_student)):
     """
         Update information about the logged-in student.
 
@@ -176,14 +156,9 @@ def update_student_info(data: dict, token: str = Header()):
         - BadRequest: If the update fails.
         - Unauthorized: If the token is blacklisted.
     """
-    if users_service.is_token_blacklisted(token):
-        return USER_LOGGED_OUT_RESPONSE
-
-    user = users_service.from_token(token)
-    if user:
-        updated_student = users_service.update_student_info(user.user_id, data)
-        if updated_student:
-            return updated_student
+    updated_student = await users_service.update_student_info(student.users_user_id, data)
+    if updated_student:
+        return updated_student
 
     return BadRequest(content="Failed to update teacher information!")
 
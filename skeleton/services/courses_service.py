@@ -1,51 +1,86 @@
 from data.database import insert_query, read_query, update_query, delete_query
-from data.models import Course, CreateCourse, CourseWithSections, Section, UpdateCourse
+from data import async_database
+from data.models import Course, CreateCourse, CourseWithSections, Section, StudentCourse, UpdateCourse
 from mariadb import IntegrityError
 from services import users_service
-from common.responses import NotFound, Forbidden
+from common.responses import Forbidden
+from common.pagination import Page, PageRequest, SortKey
+from common.catalogue_cache import bump_catalogue_version
 
 
-def get_all_teacher_courses(teacher_id: int) -> list[CourseWithSections] | None:
-    course_query = """select * from courses where owner_id = ?"""
-    course_params = (teacher_id,)
-    course_data = read_query(course_query, course_params)
+COURSE_COLUMNS = "course_id, title, description, objectives, owner_id, is_premium, rating, revision"
 
-    if not course_data:
-        return None
+TEACHER_COURSE_SORTS = {
+    "id": SortKey(("course_id",), lambda course: (course.course_id,)),
+    "title": SortKey(("title", "course_id"), lambda course: (course.title, course.course_id)),
+}
 
-    courses_with_sections = []
+STUDENT_COURSE_SORTS = {
+    "id": SortKey(("c.course_id",), lambda course: (course.course_id,)),
+}
 
-    for course_row in course_data:
-        course_id = course_row[0]
-        section_query = """select * from sections where course_id = ?"""
-        section_params = (course_id,)
-        section_data = read_query(section_query, section_params)
 
-        if not section_data:
-            sections = []
-        else:
-            sections = [Section.from_query_result(*row) for row in section_data]
+async def get_all_teacher_courses(teacher_id: int, page: PageRequest, title: str = None) -> Page:
+    course_query = f"""select {COURSE_COLUMNS} from courses where owner_id = ?"""
+    course_params = [teacher_id]
+
+    if title:
+        course_query += """ and title like ?"""
+        course_params.append(f"%{title}%")
+
+    keyset_query, keyset_params = page.where()
+    if keyset_query:
+        course_query += f""" and {keyset_query}"""
+        course_params.extend(keyset_params)
+
+    course_query += f""" order by {page.order_by} limit ?"""
+    course_params.append(page.fetch_limit)
 
+    course_data = await async_database.read_query(course_query, tuple(course_params))
+
+    sections_by_course = await get_sections_by_course_ids([course_row[0] for course_row in course_data[:page.limit]])
+
+    courses_with_sections = []
+
+    for course_row in course_data:
         course_with_sections = CourseWithSections(
             course_id=course_row[0],
             title=course_row[1],
             description=course_row[2],
             objectives=course_row[3],
-            owner_id=course_row[-3],
-            is_premium=bool(course_row[-2]),
-            sections=sections
+            owner_id=course_row[4],
+            is_premium=bool(course_row[5]),
+            revision=course_row[7],
+            sections=sections_by_course.get(course_row[0], [])
         )
 
         courses_with_sections.append(course_with_sections)
 
-    return courses_with_sections
+    return page.page(courses_with_sections)
+
+
+async def get_sections_by_course_ids(course_ids: list[int]) -> dict[int, list[Section]]:
+    sections_by_course = {}
+
+    if not course_ids:
+        return sections_by_course
+
+    placeholders = ", ".join("?" * len(course_ids))
+    section_query = f"""select * from sections where course_id in ({placeholders}) order by course_id, section_id"""
+    section_data = await async_database.read_query(section_query, tuple(course_ids))
 
+    for row in section_data:
+        section = Section.from_query_result(*row)
+        sections_by_course.setdefault(section.course_id, []).append(section)
 
-def get_teacher_course_by_id(teacher_id: int, course_id: int, order: str = "asc", title: str = None) -> \
+    return sections_by_course
+
+
+async def get_teacher_course_by_id(teacher_id: int, course_id: int, order: str = "asc", title: str = None) -> \
         CourseWithSections | None:
-    course_query = """select * from courses where owner_id = ? and course_id = ?"""
+    course_query = f"""select {COURSE_COLUMNS} from courses where owner_id = ? and course_id = ?"""
     course_params = (teacher_id, course_id)
-    course_data = read_query(course_query, course_params)
+    course_data = await async_database.read_query(course_query, course_params)
 
     if not course_data:
         return None
@@ -65,7 +100,7 @@ def get_teacher_course_by_id(teacher_id: int, course_id: int, order: str = "asc"
     if order.lower() == "desc":
         section_query += """ desc"""
 
-    section_data = read_query(section_query, section_params)
+    section_data = await async_database.read_query(section_query, section_params)
 
     if section_data:
         sections = [Section.from_query_result(*row) for row in section_data]
@@ -75,65 +110,86 @@ def get_teacher_course_by_id(teacher_id: int, course_id: int, order: str = "asc"
         title=course_row[1],
         description=course_row[2],
         objectives=course_row[3],
-        owner_id=course_row[-3],
-        is_premium=bool(course_row[-2]),
+        owner_id=course_row[4],
+        is_premium=bool(course_row[5]),
+        revision=course_row[7],
         sections=sections
     )
 
     return course_with_sections
 
 
-def get_student_course_by_id(student_id: int, course_id: int, order: str = "asc", title: str = None) -> \
-        CourseWithSections | NotFound | None:
-    course_query = """select * from courses where course_id = ?"""
-    course_params = (course_id,)
-    course_data = read_query(course_query, course_params)
+async def get_student_course_by_id(student_id: int, course_id: int, order: str = "asc", title: str = None) -> \
+        CourseWithSections | Forbidden | None:
+    section_filter = ""
+    params = [student_id]
+
+    if title:
+        section_filter = """ and s.title like ?"""
+        params.append(f"%{title}%")
+
+    params.append(course_id)
+    direction = " desc" if order.lower() == "desc" else ""
+
+    # Sections are only joined when the student may read them, so a premium course the student is
+    # not enrolled in costs a single row and no section content leaves the database.
+    course_query = f"""
+    select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.revision,
+           c.is_premium = 0 or e.students_student_id is not null as has_access,
+           s.section_id, s.title, s.content, s.description, s.external_resource, s.course_id
+    from courses c
+    left join enrollments e on e.courses_course_id = c.course_id and e.students_student_id = ?
+    left join sections s on s.course_id = c.course_id
+        and (c.is_premium = 0 or e.students_student_id is not null){section_filter}
+    where c.course_id = ?
+    order by s.section_id{direction}
+    """
+    course_data = await async_database.read_query(course_query, tuple(params))
 
     if not course_data:
         return None
 
     course_row = course_data[0]
-    is_premium = bool(course_row[-2])
 
-    if is_premium:
-        enrollment_query = """select * from enrollments where courses_course_id = ? and students_student_id = ?"""
-        enrollment_params = (course_id, student_id)
-        enrollment_data = read_query(enrollment_query, enrollment_params)
-
-        if not enrollment_data:
-            return NotFound(content="Access denied. This is a premium course and the student is not enrolled.")
-
-    section_query = """select * from sections where course_id = ?"""
-
-    if title:
-        section_query += """ and title like ?"""
-        section_params = (course_id, f"%{title}%")
-    else:
-        section_params = (course_id,)
-
-    section_query += """ order by section_id"""
-    if order.lower() == "desc":
-        section_query += """ desc"""
-
-    section_data = read_query(section_query, section_params)
-
-    sections = [Section.from_query_result(*row) for row in section_data] if section_data else []
+    if not course_row[7]:
+        return Forbidden(content="Access denied. This is a premium course and the student is not enrolled.")
 
     course_with_sections = CourseWithSections(
         course_id=course_row[0],
         title=course_row[1],
         description=course_row[2],
         objectives=course_row[3],
-        owner_id=course_row[-3],
-        is_premium=is_premium,
-        sections=sections
+        owner_id=course_row[4],
+        is_premium=bool(course_row[5]),
+        revision=course_row[6],
+        sections=[Section.from_query_result(*row[8:]) for row in course_data if row[8] is not None]
     )
 
     return course_with_sections
 
 
+async def get_teacher_course_revision(teacher_id: int, course_id: int) -> int | None:
+    revision_query = """select revision from courses where course_id = ? and owner_id = ?"""
+    revision_data = await async_database.read_query(revision_query, (course_id, teacher_id))
+
+    return revision_data[0][0] if revision_data else None
+
+
+async def get_student_course_revision(student_id: int, course_id: int) -> int | None:
+    revision_query = """
+    select c.revision
+    from courses c
+    left join enrollments e on e.courses_course_id = c.course_id and e.students_student_id = ?
+    where c.course_id = ? and (c.is_premium = 0 or e.students_student_id is not null)
+    """
+    revision_data = await async_database.read_query(revision_query, (student_id, course_id))
+
+    return revision_data[0][0] if revision_data else None
+
+
 def get_course_by_id_simpler(course_id) -> Course | None:
-    course_query = """select * from courses where course_id = ?"""
+    course_query = """select course_id, title, description, objectives, owner_id, is_premium, rating
+                      from courses where course_id = ?"""
     course_params = (course_id,)
     course_data = read_query(course_query, course_params)
 
@@ -146,48 +202,51 @@ def get_course_by_id_simpler(course_id) -> Course | None:
                   title=course_row[1],
                   description=course_row[2],
                   objectives=course_row[3],
-                  owner_id=course_row[-3],
-                  is_premium=bool(course_row[-2]),
-                  rating=course_row[-1]
+                  owner_id=course_row[4],
+                  is_premium=bool(course_row[5]),
+                  rating=course_row[6]
                   )
 
 
-def get_all_student_courses(student_id: int) -> list[Course] | None:
-    enrolled_query = """
-    select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.rating
-    from courses c
-    join enrollments e on c.course_id = e.courses_course_id
-    where e.students_student_id = ?
-    """
-    enrolled_params = (student_id,)
-    enrolled_data = read_query(enrolled_query, enrolled_params)
-
-    non_premium_query = """
-    select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.rating
-    from courses c
-    where c.is_premium = 0
-    and not exists (
-        select 1
-        from enrollments e
-        where e.courses_course_id = c.course_id
-        and e.students_student_id = ?
-    )
+async def get_all_student_courses(student_id: int, page: PageRequest) -> Page:
+    keyset_query, keyset_params = page.where()
+    keyset_filter = f"""and {keyset_query}""" if keyset_query else ""
+    direction = " desc" if page.descending else ""
+
+    courses_query = f"""
+    select course_id, title, description, objectives, owner_id, is_premium, rating, enrolled
+    from (
+        (
+            select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.rating, 1 as enrolled
+            from enrollments e
+            join courses c on c.course_id = e.courses_course_id
+            where e.students_student_id = ? {keyset_filter}
+            order by {page.order_by}
+            limit ?
+        )
+        union all
+        (
+            select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.rating, 0 as enrolled
+            from courses c
+            where c.is_premium = 0 {keyset_filter}
+            and not exists (
+                select 1
+                from enrollments e
+                where e.students_student_id = ? and e.courses_course_id = c.course_id
+            )
+            order by {page.order_by}
+            limit ?
+        )
+    ) student_courses
+    order by course_id{direction}
+    limit ?
     """
-    non_premium_params = (student_id,)
-    non_premium_data = read_query(non_premium_query, non_premium_params)
-
-    courses = []
-
-    if enrolled_data:
-        courses.extend([Course.from_query_result(*row) for row in enrolled_data])
-
-    if non_premium_data:
-        courses.extend([Course.from_query_result(*row) for row in non_premium_data])
-
-    if not courses:
-        return None
+    courses_params = (student_id, *keyset_params, page.fetch_limit,
+                      *keyset_params, student_id, page.fetch_limit,
+                      page.fetch_limit)
+    courses_data = await async_database.read_query(courses_query, courses_params)
 
-    return courses
+    return page.page([StudentCourse.from_query_result(*row) for row in courses_data])
 
 
 def create_course(teacher_id: int, data: CreateCourse) -> Course | None:
@@ -198,15 +257,16 @@ def create_course(teacher_id: int, data: CreateCourse) -> Course | None:
         (data.title, data.description, data.objectives, owner_id, data.is_premium)
     )
     if course_id:
+        bump_catalogue_version(course_id)
         return Course(course_id=course_id, title=data.title, description=data.description,
                       objectives=data.objectives, owner_id=owner_id, is_premium=data.is_premium)
     return None
 
 
-def update_course(course_id: int, data: UpdateCourse, teacher_id: int) -> Course | None:
+def update_course(course_id: int, data: UpdateCourse, teacher_id: int) -> CourseWithSections | None:
 
     rows_affected = update_query(
-            """update courses SET title = ?, description = ?, objectives = ?, is_premium = ?
+            """update courses SET title = ?, description = ?, objectives = ?, is_premium = ?, revision = revision + 1
              where course_id = ? and owner_id = ?""",
             (data.title, data.description, data.objectives, data.is_premium, course_id, teacher_id)
         )
@@ -214,17 +274,37 @@ def update_course(course_id: int, data: UpdateCourse, teacher_id: int) -> Course
     if rows_affected == 0:
         return None
 
-    updated_course = get_teacher_course_by_id(teacher_id, course_id)
+    bump_catalogue_version(course_id)
+
+    revision = read_query("""select revision from courses where course_id = ?""", (course_id,))[0][0]
+    section_data = read_query("""select * from sections where course_id = ? order by section_id""", (course_id,))
+
+    updated_course = CourseWithSections(
+        course_id=course_id,
+        title=data.title,
+        description=data.description,
+        objectives=data.objectives,
+        owner_id=teacher_id,
+        is_premium=data.is_premium,
+        revision=revision,
+        sections=[Section.from_query_result(*row) for row in section_data]
+    )
 
     return updated_course
 
 
 def delete_course_if_no_enrollments(course_id: int) -> bool:
+    delete_query("""delete from course_ratings where course_id = ?""", (course_id,))
+
     delete_course_query = """delete from courses where course_id = ?"""
     delete_course_params = (course_id,)
     result = delete_query(delete_course_query, delete_course_params)
 
-    return result > 0
+    if result > 0:
+        bump_catalogue_version(course_id)
+        return True
+
+    return False
 
 
 def is_course_deleted(course_id: int) -> bool:
@@ -235,14 +315,6 @@ def is_course_deleted(course_id: int) -> bool:
     return not course_data
 
 
-def is_student_enrolled_in_course(student_id: int, course_id: int) -> bool:
-    enrollment_query = """select 1 from enrollments where students_student_id = ? and courses_course_id = ?"""
-    enrollment_params = (student_id, course_id)
-    enrollment_data = read_query(enrollment_query, enrollment_params)
-
-    return bool(enrollment_data)
-
-
 def course_has_enrolled_students(course_id: int) -> bool:
     enrollments_query = """select count(*) from enrollments where courses_course_id = ?"""
     enrollments_data = read_query(enrollments_query, (course_id,))
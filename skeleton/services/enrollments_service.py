@@ -1,5 +1,8 @@
-from data.database import read_query, insert_query, delete_query
+from datetime import datetime
+from typing import Iterator
+from data.database import read_query, insert_query, delete_query, stream_query
 from data.models import StudentReport
+from common.pagination import Page, PageRequest, SortKey
 
 
 def is_student_enrolled(student_id: int, course_id: int) -> bool:
@@ -16,6 +19,11 @@ def is_student_not_enrolled(student_id: int, course_id: int) -> bool:
     return result[0][0] == 0
 
 
+def lock_student_enrollments(student_id: int):
+    lock_query = """select student_id from students where student_id = ? for update"""
+    read_query(lock_query, (student_id,), primary=True)
+
+
 def get_premium_course_count(student_id: int) -> int:
     premium_count_query = """select count(*) from enrollments join courses on 
     enrollments.courses_course_id = courses.course_id where 
@@ -34,14 +42,61 @@ def unsubscribe_from_course(student_id: int, course_id: int):
     delete_query(unsubscribe_query, (student_id, course_id))
 
 
-def get_students_by_teacher_id(teacher_id: int) -> list[StudentReport]:
+STUDENT_REPORT_SORTS = {
+    "course": SortKey(("c.course_id", "s.student_id"), lambda report: (report.course_id, report.student_id)),
+}
+
+STUDENT_REPORT_COLUMNS = ("student_id", "first_name", "last_name", "email", "course_id", "course_title", "enrolled_at")
+
+
+def _student_report_query(teacher_id: int, course_id: int = None, enrolled_after: datetime = None) -> \
+        tuple[str, list]:
     query = """
-    select s.student_id, s.first_name, s.last_name, s.email, c.course_id, c.title
+    select s.student_id, s.first_name, s.last_name, s.email, c.course_id, c.title, e.enrolled_at
     from students s
     join enrollments e ON s.student_id = e.students_student_id
     join courses c on e.courses_course_id = c.course_id
     where c.owner_id = ?
     """
-    data = read_query(query, (teacher_id,))
+    params = [teacher_id]
+
+    if course_id is not None:
+        query += """ and c.course_id = ?"""
+        params.append(course_id)
+
+    if enrolled_after is not None:
+        query += """ and e.enrolled_at > ?"""
+        params.append(enrolled_after)
+
+    return query, params
+
+
+def stream_student_report_rows(teacher_id: int, course_id: int = None, enrolled_after: datetime = None) -> \
+        Iterator[tuple]:
+    query, params = _student_report_query(teacher_id, course_id, enrolled_after)
+
+    return stream_query(query, tuple(params))
+
+
+def get_student_report_page(teacher_id: int, page: PageRequest, course_id: int = None,
+                            enrolled_after: datetime = None) -> Page:
+    query, params = _student_report_query(teacher_id, course_id, enrolled_after)
+
+    keyset_query, keyset_params = page.where()
+    if keyset_query:
+        query += f""" and {keyset_query}"""
+        params.extend(keyset_params)
+
+    query += f""" order by {page.order_by} limit ?"""
+    params.append(page.fetch_limit)
+
+    data = read_query(query, tuple(params))
+
+    return page.page([StudentReport.from_query_result(*row) for row in data])
+
+
+def get_students_by_teacher_id(teacher_id: int, course_id: int = None, enrolled_after: datetime = None) -> \
+        Iterator[StudentReport]:
+    rows = stream_student_report_rows(teacher_id, course_id, enrolled_after)
 
-    return [StudentReport.from_query_result(*row) for row in data]
+    return (StudentReport.from_query_result(*row) for row in rows)
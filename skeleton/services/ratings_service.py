@@ -0,0 +1,82 @@
+from data.database import insert_query, read_query, update_query
+from data import async_database
+from data.models import CourseRating, TopRatedCourse
+from mariadb import Error
+from common.constants import MIN_RATING
+from common.responses import Conflict
+from common.pagination import Page, PageRequest, SortKey
+from common.catalogue_cache import bump_ratings_version
+
+
+# MariaDB error: the transaction was chosen as a deadlock victim and rolled back.
+ER_LOCK_DEADLOCK = 1213
+
+
+TOP_RATED_SORTS = {
+    "rating": SortKey(("rating", "course_id"), lambda course: (course.rating, course.course_id)),
+}
+
+
+def rate_course(student_id: int, course_id: int, rating: int) -> CourseRating | Conflict:
+    """
+        Save the student's rating of the course, replacing an earlier one, and update the running
+        sum, count and average of the course's ratings in the same transaction.
+
+        The course row is locked first. Every rating of the course updates it anyway, so concurrent
+        ratings of one course, including two first ratings by the same student, run one after the
+        other and each sees the rating the one before saved. Ratings of different courses can still
+        deadlock on the gap locks of missing rating rows; the rolled back request gets a Conflict.
+    """
+    try:
+        read_query("""select course_id from courses where course_id = ? for update""", (course_id,), primary=True)
+        previous_data = read_query(
+            """select rating from course_ratings where student_id = ? and course_id = ? for update""",
+            (student_id, course_id), primary=True)
+
+        insert_query(
+            """insert into course_ratings (student_id, course_id, rating) values (?, ?, ?)
+               on duplicate key update rating = values(rating), rated_at = current_timestamp""",
+            (student_id, course_id, rating))
+        if previous_data:
+            sum_delta, count_delta = rating - previous_data[0][0], 0
+        else:
+            sum_delta, count_delta = rating, 1
+
+        # The average is assigned first: MariaDB evaluates the assignments left to right, so it still
+        # sees the old sum and count.
+        update_query(
+            """update courses
+               set rating = round((rating_sum + ?) / (rating_count + ?), 2),
+                   rating_sum = rating_sum + ?,
+                   rating_count = rating_count + ?
+               where course_id = ?""",
+            (sum_delta, count_delta, sum_delta, count_delta, course_id))
+    except Error as error:
+        if getattr(error, "errno", None) != ER_LOCK_DEADLOCK:
+            raise
+        return Conflict(content="The course could not be rated because of a concurrent rating, please try again!")
+
+    bump_ratings_version(course_id)
+
+    average_data = read_query("""select rating, rating_count from courses where course_id = ?""", (course_id,))
+
+    return CourseRating(course_id=course_id, rating=rating, average_rating=average_data[0][0],
+                        rating_count=average_data[0][1])
+
+
+async def get_top_rated_courses(page: PageRequest, min_rating: float = None) -> Page:
+    courses_query = """select course_id, title, description, is_premium, rating, rating_count
+                       from courses where rating >= ?"""
+    courses_params = [max(min_rating or MIN_RATING, MIN_RATING)]
+
+    keyset_query, keyset_params = page.where()
+    if keyset_query:
+        courses_query += f""" and {keyset_query}"""
+        courses_params.extend(keyset_params)
+
+    courses_query += f""" order by {page.order_by} limit ?"""
+    courses_params.append(page.fetch_limit)
+
+    courses_data = await async_database.read_query(courses_query, tuple(courses_params))
+
+    return page.page([TopRatedCourse.from_query_result(*row) for row in courses_data])
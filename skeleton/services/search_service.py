@@ -0,0 +1,200 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from data import async_database
+from data.models import CourseSearchResult
+from common.pagination import Page, PageRequest, SortKey
+from common.catalogue_cache import catalogue_cache
+from common.search_index import CourseDocument, CourseSearchIndex
+from common.tag_bitmaps import TagBitmapIndex
+
+
+SEARCH_SORTS = {
+    "relevance": SortKey(("score", "course_id"), lambda result: (result.score, result.course_id)),
+    "rating": SortKey(("rating", "course_id"), lambda result: (result.rating, result.course_id)),
+    "id": SortKey(("course_id",), lambda result: (result.course_id,)),
+}
+
+SEARCH_SORT_VALUES = {
+    "relevance": lambda score, course: (score, course.course_id),
+    "rating": lambda score, course: (course.rating, course.course_id),
+    "id": lambda score, course: (course.course_id,),
+}
+
+
+def _load_documents(course_rows, tag_rows) -> list[CourseDocument]:
+    tags_by_course = {}
+    for course_id, tag_name in tag_rows:
+        tags_by_course.setdefault(course_id, []).append(tag_name)
+
+    return [CourseDocument(course_id, title, description, objectives, bool(is_premium), float(rating or 0),
+                           tags_by_course.get(course_id, ()))
+            for course_id, title, description, objectives, is_premium, rating in course_rows]
+
+
+def _build_indexes(course_rows, tag_rows) -> tuple[CourseSearchIndex, TagBitmapIndex]:
+    documents = _load_documents(course_rows, tag_rows)
+    index = CourseSearchIndex()
+    for document in documents:
+        index.add(document)
+    tag_bitmaps = TagBitmapIndex.from_courses((document.course_id, document.tags, document.is_premium)
+                                              for document in documents)
+    return index, tag_bitmaps
+
+
+class CourseSearch:
+    """
+        The course search index and tag bitmaps of this worker and the policy that keeps them current.
+
+        Both are built from the database at startup. Every course and tag write records the changed
+        course in `catalogue_changes` (see `bump_catalogue_version`); queries pull the new rows when
+        the catalogue version moves, and at least every `refresh_interval` seconds, and re-index
+        just those courses from the database. A change is therefore visible at once on the worker
+        that made it and within about a second on the others. The changes and the courses are read
+        from the primary. Change ids are allocated before their transaction commits, so a gap in the
+        ids is re-read until it fills or `settle_seconds` pass. The index is rebuilt from scratch every
+        `rebuild_interval` seconds, which also purges changes older than `change_retention`; changes
+        are followed on from the settled position after every rebuild, so a pending gap survives it.
+    """
+
+    def __init__(self, refresh_interval: float = 1, settle_seconds: float = 10, rebuild_interval: float = 3600,
+                 change_retention: timedelta = timedelta(days=1)):
+        self.refresh_interval = refresh_interval
+        self.settle_seconds = settle_seconds
+        self.rebuild_interval = rebuild_interval
+        self.change_retention = change_retention
+        self.index = CourseSearchIndex()
+        self.tag_bitmaps = TagBitmapIndex()
+        self._version: int | None = None
+        self._lock = asyncio.Lock()
+        self._built = False
+        self._last_change_id = 0
+        self._gap_since: float | None = None
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+
+    def _is_fresh(self, now: float, version: int) -> bool:
+        return self._built and version == self._version and now - self._last_refresh < self.refresh_interval
+
+    async def refresh(self):
+        now = time.monotonic()
+        version = await catalogue_cache.version()
+        if self._is_fresh(now, version) or (self._built and self._lock.locked()):
+            return
+
+        async with self._lock:
+            if self._is_fresh(now, version):
+                return
+            self._last_refresh = now
+            self._version = version
+
+            # The change feed and the courses it points at are read from the primary: a lagging
+            # replica could return a change whose course rows it has not replayed yet, and the
+            # stale course would stay indexed once the change is marked as seen.
+            with async_database.reading_from_primary():
+                if not self._built or now - self._last_rebuild >= self.rebuild_interval:
+                    await self.rebuild()
+                await self._apply_changes(now)
+
+    async def rebuild(self):
+        self._last_rebuild = time.monotonic()
+        await async_database.delete_query("""delete from catalogue_changes where changed_at < ?""",
+                                          (datetime.utcnow() - self.change_retention,))
+
+        if not self._built:
+            # A change can be numbered below the newest one and still commit after the courses are
+            # read below, so the first build starts after the last change older than
+            # `settle_seconds` and re-applies the rest. Later builds keep the settled position.
+            settled_before = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+            last_change = await async_database.read_query(
+                """select coalesce(max(id), 0) from catalogue_changes where changed_at < ?""", (settled_before,))
+            self._last_change_id = last_change[0][0]
+
+        course_rows = await async_database.read_query(
+            """select course_id, title, description, objectives, is_premium, rating from courses""")
+        tag_rows = await async_database.read_query(
+            """select ctm.course_id, ct.tag_name
+               from course_tag_mapping ctm
+               join course_tags ct on ct.tag_id = ctm.tag_id""")
+
+        loop = asyncio.get_running_loop()
+        self.index, self.tag_bitmaps = await loop.run_in_executor(None, _build_indexes, course_rows, tag_rows)
+        self._built = True
+
+    async def _apply_changes(self, now: float):
+        rows = await async_database.read_query(
+            """select id, course_id from catalogue_changes where id > ? order by id""",
+            (self._last_change_id,))
+        if not rows:
+            return
+
+        await self.reindex({course_id for _, course_id in rows})
+
+        settled_id = self._last_change_id
+        for change_id, _ in rows:
+            if change_id != settled_id + 1:
+                break
+            settled_id = change_id
+
+        if settled_id == rows[-1][0]:
+            self._gap_since = None
+        elif self._gap_since is None:
+            self._gap_since = now
+        elif now - self._gap_since >= self.settle_seconds:
+            settled_id = rows[-1][0]
+            self._gap_since = None
+
+        self._last_change_id = settled_id
+
+    async def reindex(self, course_ids: set[int]):
+        placeholders = ", ".join("?" * len(course_ids))
+        course_rows = await async_database.read_query(
+            f"""select course_id, title, description, objectives, is_premium, rating
+                from courses where course_id in ({placeholders})""",
+            tuple(course_ids))
+        tag_rows = await async_database.read_query(
+            f"""select ctm.course_id, ct.tag_name
+                from course_tag_mapping ctm
+                join course_tags ct on ct.tag_id = ctm.tag_id
+                where ctm.course_id in ({placeholders})""",
+            tuple(course_ids))
+
+        for course_id in course_ids:
+            self.index.remove(course_id)
+            self.tag_bitmaps.remove(course_id)
+        for document in _load_documents(course_rows, tag_rows):
+            self.index.add(document)
+            self.tag_bitmaps.add(document.course_id, document.tags, document.is_premium)
+
+    def stats(self) -> dict:
+        return {"courses": len(self.index), "tags": len(self.tag_bitmaps), "last_change_id": self._last_change_id,
+                "refresh_interval_seconds": self.refresh_interval, "rebuild_interval_seconds": self.rebuild_interval}
+
+
+course_search = CourseSearch()
+
+
+async def search_courses(query: str | None, tags: list[str], min_rating: float | None, page: PageRequest) -> Page:
+    await course_search.refresh()
+
+    sort_values = SEARCH_SORT_VALUES[page.sort]
+    keep = None
+    if page.after is not None:
+        after = tuple(page.after)
+        if not all(isinstance(value, (int, float)) for value in after):
+            raise HTTPException(status_code=400, detail="Invalid page cursor")
+        if page.descending:
+            keep = lambda score, course: sort_values(score, course) < after
+        else:
+            keep = lambda score, course: sort_values(score, course) > after
+
+    results = course_search.index.search(query, tags, min_rating, keep=keep, key=sort_values,
+                                         limit=page.fetch_limit, descending=page.descending)
+
+    return page.page([CourseSearchResult(course_id=course.course_id, title=course.title,
+                                         description=course.description, is_premium=course.is_premium,
+                                         rating=course.rating, tags=list(course.tags), score=score)
+                      for score, course in results])
@@ -1,6 +1,5 @@
 from data.database import insert_query, read_query, delete_query, update_query
 from data.models import Section, CreateSection, UpdateSection
-from services import users_service, courses_service
 
 
 def create_new_section(data: CreateSection) -> Section | None:
@@ -10,12 +9,21 @@ def create_new_section(data: CreateSection) -> Section | None:
         (data.title, data.content, data.description, data.external_resource, data.course_id))
 
     if section_id:
+        update_query("""update courses set revision = revision + 1 where course_id = ?""", (data.course_id,))
         return Section(section_id=section_id, title=data.title, content=data.content,
                        description=data.description, external_resource=data.external_resource,
                        course_id=data.course_id)
     return None
 
 
+def bump_course_revision_for_section(section_id: int):
+    update_query(
+        """update courses set revision = revision + 1
+           where course_id = (select course_id from sections where section_id = ?)""",
+        (section_id,)
+    )
+
+
 def update_section(section_id: int, data: UpdateSection) -> bool:
     rows_affected = update_query(
         """update sections set title = ?, content = ?, description = ?, external_resource = ? 
@@ -24,12 +32,14 @@ def update_section(section_id: int, data: UpdateSection) -> bool:
     )
 
     if rows_affected:
+        bump_course_revision_for_section(section_id)
         return True
 
     return False
 
 
 def delete_section(section_id: int) -> bool:
+    bump_course_revision_for_section(section_id)
     rows_affected = delete_query(
         """delete from sections where section_id = ?""",
         (section_id,)
@@ -40,27 +50,14 @@ def delete_section(section_id: int) -> bool:
     return False
 
 
-def get_course_id_for_section(section_id: int) -> int | None:
-    section_query = """select course_id from sections where section_id = ?"""
-    section_data = read_query(section_query, (section_id,))
-
-    if section_data:
-        return section_data[0][0]
-
-    return None
-
-
 def is_section_owner(section_id: int, user_id: int) -> bool:
-    course_id = get_course_id_for_section(section_id)
-    if not course_id:
-        return False
-
-    teacher = users_service.get_teacher_by_user_id(user_id)
-    if not teacher:
-        return False
-
-    course = courses_service.get_teacher_course_by_id(user_id, course_id)
-    if not course:
-        return False
-
-    return course.owner_id == teacher.teacher_id
+    ownership_query = """
+    select 1
+    from sections s
+    join courses c on c.course_id = s.course_id
+    join teachers t on t.teacher_id = c.owner_id
+    where s.section_id = ? and t.users_user_id = ?
+    """
+    ownership_data = read_query(ownership_query, (section_id, user_id))
+
+    return bool(ownership_data)
@@ -1,7 +1,24 @@
+from itertools import islice
+from fastapi import HTTPException
 from data.database import insert_query, read_query, delete_query
+from data import async_database
 from data.models import Tag
 from mariadb import IntegrityError
 from common.responses import NotFound, BadRequest
+from common.pagination import Page, PageRequest, SortKey
+from common.catalogue_cache import bump_catalogue_version
+from common.tag_bitmaps import iter_bits
+from services.search_service import course_search
+
+
+CATALOGUE_SORTS = {
+    "id": SortKey(("course_id",), lambda course: (course["course_id"],)),
+}
+
+
+class TagFilterPage(Page):
+    count: int
+    facets: dict[str, int]
 
 
 def create_tag(tag_name: str) -> Tag | BadRequest:
@@ -11,6 +28,7 @@ def create_tag(tag_name: str) -> Tag | BadRequest:
             (tag_name,)
         )
         if tag_id:
+            bump_catalogue_version()
             return Tag(tag_id=tag_id, tag_name=tag_name)
         return BadRequest(content="Tag creation failed")
     except IntegrityError:
@@ -29,6 +47,7 @@ def delete_tag(tag_id: int) -> dict | NotFound:
         """delete from course_tags where tag_id = ?""",
         (tag_id,)
     )
+    bump_catalogue_version()
     return {"message": "Tag deleted successfully"}
 
 
@@ -52,6 +71,7 @@ def add_tag_to_course(course_id: int, tag_id: int) -> dict | NotFound | BadReque
         "insert into course_tag_mapping (course_id, tag_id) values (?, ?)",
         (course_id, tag_id)
     )
+    bump_catalogue_version(course_id)
 
     return {"message": "Tag added to course successfully"}
 
@@ -66,17 +86,18 @@ def remove_tag_from_course(course_id: int, tag_id: int) -> dict | NotFound:
         "delete from course_tag_mapping where course_id = ? and tag_id = ?",
         (course_id, tag_id)
     )
+    bump_catalogue_version(course_id)
 
     return {"message": "Tag removed from course successfully"}
 
 
-def get_course_with_tags(course_id: int) -> dict | NotFound:
+async def get_course_with_tags(course_id: int) -> dict | NotFound:
     course_query = """
     select title
     from courses
     where course_id = ?
     """
-    course_data = read_query(course_query, (course_id,))
+    course_data = await async_database.read_query(course_query, (course_id,))
     if not course_data:
         return NotFound(content=f"Course with ID {course_id} not found!")
 
@@ -86,7 +107,7 @@ def get_course_with_tags(course_id: int) -> dict | NotFound:
     join course_tags ct on ctm.tag_id = ct.tag_id
     where ctm.course_id = ?
     """
-    tags_data = read_query(tags_query, (course_id,))
+    tags_data = await async_database.read_query(tags_query, (course_id,))
 
     course_with_tags = {
         "course_id": course_id,
@@ -97,34 +118,69 @@ def get_course_with_tags(course_id: int) -> dict | NotFound:
     return course_with_tags
 
 
-def get_all_courses_with_tags() -> list:
-    courses_query = """
-    select course_id, title
-    from courses
+async def get_all_courses_with_tags(page: PageRequest) -> Page:
+    keyset_query, keyset_params = page.where()
+    keyset_filter = f"""where {keyset_query}""" if keyset_query else ""
+    direction = " desc" if page.descending else ""
+
+    courses_query = f"""
+    select c.course_id, c.title, ct.tag_id, ct.tag_name
+    from (
+        select course_id, title
+        from courses
+        {keyset_filter}
+        order by {page.order_by}
+        limit ?
+    ) c
+    left join course_tag_mapping ctm on ctm.course_id = c.course_id
+    left join course_tags ct on ct.tag_id = ctm.tag_id
+    order by c.course_id{direction}, ct.tag_id
     """
-    courses_data = read_query(courses_query)
+    courses_data = await async_database.read_query(courses_query, (*keyset_params, page.fetch_limit))
 
     courses_with_tags = []
 
-    for course in courses_data:
-        course_id = course[0]
-        course_name = course[1]
-
-        tags_query = """
-        select ct.tag_id, ct.tag_name
-        from course_tag_mapping ctm
-        join course_tags ct on ctm.tag_id = ct.tag_id
-        where ctm.course_id = ?
-        """
-        tags_data = read_query(tags_query, (course_id,))
-
-        course_with_tags = {
+    for course_id, course_name, tag_id, tag_name in courses_data:
+        if not courses_with_tags or courses_with_tags[-1]["course_id"] != course_id:
+            courses_with_tags.append({
+                "course_id": course_id,
+                "course_name": course_name,
+                "tags": []
+            })
+
+        if tag_id is not None:
+            courses_with_tags[-1]["tags"].append((tag_id, tag_name))
+
+    return page.page(courses_with_tags)
+
+
+async def filter_courses_by_tags(all_tags: list[str], any_tags: list[str], no_tags: list[str],
+                                 is_premium: bool | None, page: PageRequest) -> TagFilterPage:
+    await course_search.refresh()
+    tag_bitmaps = course_search.tag_bitmaps
+
+    matching = tag_bitmaps.match(all_tags, any_tags, no_tags, is_premium)
+    page_bits = matching
+
+    if page.after is not None:
+        after = page.after[0]
+        if not isinstance(after, int) or after < 0:
+            raise HTTPException(status_code=400, detail="Invalid page cursor")
+        if page.descending:
+            page_bits &= (1 << after) - 1
+        else:
+            page_bits = page_bits >> (after + 1) << (after + 1)
+
+    courses = []
+    for course_id in islice(iter_bits(page_bits, page.descending), page.fetch_limit):
+        course = course_search.index.get(course_id)
+        courses.append({
             "course_id": course_id,
-            "course_name": course_name,
-            "tags": tags_data
-        }
-
-        courses_with_tags.append(course_with_tags)
-
-    return courses_with_tags
-
+            "course_name": course.title,
+            "is_premium": course.is_premium,
+            "tags": list(course.tags)
+        })
+
+    courses_page = page.page(courses)
+    return TagFilterPage(items=courses_page.items, next=courses_page.next, count=matching.bit_count(),
+                         facets=tag_bitmaps.facets(matching))
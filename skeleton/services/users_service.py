@@ -1,31 +1,51 @@
-from data.database import insert_query, read_query, update_query
-from data.models import User, Teacher, Student, TeacherRegistration, StudentRegistration
+from data.database import insert_query, read_query, update_query, after_commit
+from data import async_database
+from data.models import User, Teacher, Student, TeacherRegistration, StudentRegistration, Principal
+from common.cache import TTLCache
+from common.token_blacklist import create_token_blacklist
+from common.signing_keys import load_signing_keys
+from common.passwords import hash_password_async, verify_password_async
 from mariadb import IntegrityError
-from jose import jwt, JWTError
+from starlette.concurrency import run_in_threadpool
+from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta
-import secrets
-import bcrypt
+import time
 
 
-SECRET_KEY = secrets.token_hex(32)
+signing_keys = load_signing_keys()
 ALGORITHM = "HS256"
 
 TOKEN_EXPIRATION_MINUTES = 30
 
-blacklisted_tokens = {}
+TOKEN_BLACKLIST_BACKEND = "database"
 
+token_blacklist = create_token_blacklist(TOKEN_BLACKLIST_BACKEND)
 
-def create_teacher(data: TeacherRegistration) -> Teacher | None:
-    hashed_password = bcrypt.hashpw(data.password.encode('utf-8'), bcrypt.gensalt())
+PRINCIPAL_CACHE_TTL_SECONDS = 30
+PRINCIPAL_CACHE_MAX_SIZE = 10_000
+
+principal_cache = TTLCache(max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+DECODED_TOKEN_CACHE_MAX_SIZE = 10_000
+
+decoded_token_cache = TTLCache(max_size=DECODED_TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_EXPIRATION_MINUTES * 60)
+
+
+async def create_teacher(data: TeacherRegistration) -> Teacher | None:
+    hashed_password = await hash_password_async(data.password)
+    return await run_in_threadpool(_insert_teacher, data, hashed_password)
+
+
+def _insert_teacher(data: TeacherRegistration, hashed_password: str) -> Teacher | None:
     try:
         user_id = insert_query(
             """insert into users (email, password, is_admin) values (?, ?, ?)""",
-            (data.email, data.password, 0))
+            (data.email, hashed_password, 0))
         if user_id:
             teacher_id = insert_query(
                 """insert into teachers (email, first_name, last_name, password, phone_number,
                  linkedin_account, users_user_id) values (?, ?, ?, ?, ?, ?, ?)""",
-                (data.email, data.first_name, data.last_name, data.password,
+                (data.email, data.first_name, data.last_name, hashed_password,
                  data.phone_number, data.linkedin_account, user_id))
             if teacher_id:
                 return Teacher(teacher_id=teacher_id, email=data.email, first_name=data.first_name,
@@ -36,17 +56,21 @@ def create_teacher(data: TeacherRegistration) -> Teacher | None:
         return None
 
 
-def create_student(data: StudentRegistration) -> Student | None:
-    hashed_password = bcrypt.hashpw(data.password.encode('utf-8'), bcrypt.gensalt())
+async def create_student(data: StudentRegistration) -> Student | None:
+    hashed_password = await hash_password_async(data.password)
+    return await run_in_threadpool(_insert_student, data, hashed_password)
+
+
+def _insert_student(data: StudentRegistration, hashed_password: str) -> Student | None:
     try:
         user_id = insert_query(
             """insert into users (email, password, is_admin) values (?, ?, ?)""",
-            (data.email, data.password, 0))
+            (data.email, hashed_password, 0))
         if user_id:
             student_id = insert_query(
                 """insert into students (users_user_id, email, first_name, last_name, password) 
                    values (?, ?, ?, ?, ?)""",
-                (user_id, data.email, data.first_name, data.last_name, data.password))
+                (user_id, data.email, data.first_name, data.last_name, hashed_password))
             if student_id:
                 return Student(student_id=student_id, users_user_id=user_id, email=data.email,
                                first_name=data.first_name, last_name=data.last_name, password=hashed_password)
@@ -67,20 +91,22 @@ def get_by_id(user_id: int) -> User | None:
     return next((User.from_query_result(*row) for row in data), None)
 
 
-def try_login(email: str, password: str) -> User | None:
-    user = find_by_email(email)
-    if user and user.password == password:
+async def try_login(email: str, password: str) -> User | None:
+    data = await async_database.read_query("""select * from users where email = ?""", (email,))
+    user = next((User.from_query_result(*row) for row in data), None)
+    if user and await verify_password_async(password, user.password):
         return user
     return None
 
 
 def add_token_to_blacklist(token: str):
-    if token not in blacklisted_tokens:
-        blacklisted_tokens[token] = True
+    payload = verify_jwt_token(token)
+    token_blacklist.add(token, payload["exp"])
+    decoded_token_cache.delete(token)
 
 
 def is_token_blacklisted(token: str) -> bool:
-    return token in blacklisted_tokens
+    return token_blacklist.contains(token)
 
 
 def create_jwt_token(user_id: int, email: str) -> str:
@@ -89,16 +115,41 @@ def create_jwt_token(user_id: int, email: str) -> str:
         "email": email,
         "exp": datetime.utcnow() + timedelta(minutes=TOKEN_EXPIRATION_MINUTES)
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(payload, signing_keys.current_key, algorithm=ALGORITHM,
+                      headers={"kid": signing_keys.current_kid})
 
 
 def verify_jwt_token(token: str) -> dict:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    payload = decoded_token_cache.get(token)
+    if payload:
         return payload
+
+    try:
+        payload = _decode_jwt_token(token)
     except jwt.JWTError as e:
         raise JWTError("Token verification failed") from e
 
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        decoded_token_cache.set(token, payload, ttl=expires_in)
+
+    return payload
+
+
+def _decode_jwt_token(token: str) -> dict:
+    kid = jwt.get_unverified_header(token).get("kid")
+    keys = signing_keys.verification_keys(kid)
+
+    for key in keys[:-1]:
+        try:
+            return jwt.decode(token, key, algorithms=[ALGORITHM])
+        except ExpiredSignatureError:
+            raise
+        except JWTError:
+            continue
+
+    return jwt.decode(token, keys[-1], algorithms=[ALGORITHM])
+
 
 def create_token(user: User) -> str:
     return create_jwt_token(user.id, user.username)
@@ -116,6 +167,43 @@ def from_token(token: str) -> User | None:
     return None
 
 
+async def get_principal(user_id: int) -> Principal | None:
+    principal = principal_cache.get(user_id)
+    if principal:
+        return principal
+
+    data = await async_database.read_query(
+        """select u.user_id, u.email, u.password, u.is_admin,
+                  t.teacher_id, t.email, t.first_name, t.last_name, t.password, t.phone_number,
+                  t.linkedin_account, t.users_user_id,
+                  s.student_id, s.users_user_id, s.email, s.first_name, s.last_name, s.password
+           from users u
+           left join teachers t on t.users_user_id = u.user_id
+           left join students s on s.users_user_id = u.user_id
+           where u.user_id = ?""",
+        (user_id,))
+    if not data:
+        return None
+
+    row = data[0]
+    principal = Principal(
+        user=User.from_query_result(*row[:4]),
+        teacher=Teacher.from_query_result(*row[4:12]) if row[4] is not None else None,
+        student=Student.from_query_result(*row[12:]) if row[12] is not None else None
+    )
+    principal_cache.set(user_id, principal)
+
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    """
+        Drop the cached principal once the current transaction commits. Dropping it earlier lets a
+        concurrent request cache the old row again before the change is visible.
+    """
+    after_commit(lambda: principal_cache.delete(user_id))
+
+
 def is_teacher(user_id: int) -> bool:
     data = read_query(
         """select count(*) from teachers where users_user_id = ?""",
@@ -137,7 +225,14 @@ def get_student_by_user_id(user_id: int) -> Student | None:
     return next((Student.from_query_result(*row) for row in data), None)
 
 
-def update_teacher_info(user_id: int, data: dict) -> Teacher | None:
+async def update_teacher_info(user_id: int, data: dict) -> Teacher | None:
+    if "password" in data:
+        data = {**data, "password": await hash_password_async(data["password"])}
+
+    return await run_in_threadpool(_update_teacher_info, user_id, data)
+
+
+def _update_teacher_info(user_id: int, data: dict) -> Teacher | None:
     teacher_fields = []
     user_fields = []
     values = []
@@ -175,12 +270,20 @@ def update_teacher_info(user_id: int, data: dict) -> Teacher | None:
             update_user_query_str = f"""update users set {', '.join(user_fields)} where user_id = ?"""
             update_query(update_user_query_str, user_values)
 
+        invalidate_principal(user_id)
         return get_teacher_by_user_id(user_id)
     except IntegrityError:
         return None
 
 
-def update_student_info(user_id: int, data: dict) -> Student | None:
+async def update_student_info(user_id: int, data: dict) -> Student | None:
+    if "password" in data:
+        data = {**data, "password": await hash_password_async(data["password"])}
+
+    return await run_in_threadpool(_update_student_info, user_id, data)
+
+
+def _update_student_info(user_id: int, data: dict) -> Student | None:
     student_fields = []
     user_fields = []
     values = []
@@ -212,6 +315,7 @@ def update_student_info(user_id: int, data: dict) -> Student | None:
             update_user_query_str = f"""update users set {', '.join(user_fields)} where user_id = ?"""
             update_query(update_user_query_str, user_values)
 
+        invalidate_principal(user_id)
         return get_student_by_user_id(user_id)
     except IntegrityError:
         return None
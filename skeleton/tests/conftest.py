@@ -0,0 +1,4 @@
+import os
+
+# Sign test tokens with a fixed key instead of generating jwt_keys.json next to the code.
+os.environ.setdefault("POODLE_JWT_KEYS", "test:test-secret")
@@ -0,0 +1,33 @@
+import asyncio
+
+from data import async_database
+
+
+class FakePool:
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def test_concurrent_first_requests_share_one_pool(monkeypatch):
+    created = []
+
+    async def create_pool(**kwargs):
+        await asyncio.sleep(0.01)
+        created.append(kwargs["host"])
+        return FakePool()
+
+    monkeypatch.setattr(async_database.aiomysql, "create_pool", create_pool)
+    monkeypatch.setattr(async_database, "_pools", {})
+    monkeypatch.setattr(async_database, "_pool_locks", {})
+
+    async def scenario():
+        return await asyncio.gather(*(async_database.get_pool() for _ in range(20)))
+
+    pools = asyncio.run(scenario())
+
+    assert len(created) == 1
+    assert all(pool is pools[0] for pool in pools)
+    assert async_database._pools == {async_database.PRIMARY: pools[0]}
@@ -0,0 +1,77 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from common.authentication import current_teacher, current_user
+from data.models import Teacher, User
+from services import users_service
+
+
+TEACHER_ROW = (1, "teacher@example.com", "hash", 0,
+               10, "teacher@example.com", "Ana", "Petrova", "hash", "0888", None, 1,
+               None, None, None, None, None, None)
+
+app = FastAPI()
+
+
+@app.get("/teacher")
+async def teacher_endpoint(teacher: Teacher = Depends(current_teacher), user: User = Depends(current_user)):
+    return {"teacher_id": teacher.teacher_id, "user_id": user.user_id}
+
+
+@pytest.fixture
+def queries(monkeypatch) -> list:
+    queries = []
+
+    async def read_query(sql, sql_params=()):
+        queries.append(sql)
+        return [TEACHER_ROW]
+
+    monkeypatch.setattr(users_service.async_database, "read_query", read_query)
+    monkeypatch.setattr(users_service.token_blacklist, "contains", lambda token: False)
+    users_service.principal_cache.clear()
+    yield queries
+    users_service.principal_cache.clear()
+
+
+def test_request_resolves_token_user_and_role_with_one_query(queries):
+    client = TestClient(app)
+    token = users_service.create_jwt_token(1, "teacher@example.com")
+
+    response = client.get("/teacher", headers={"token": token})
+
+    assert response.json() == {"teacher_id": 10, "user_id": 1}
+    assert len(queries) == 1
+
+
+def test_auth_query_count_benchmark(queries):
+    """
+        Auth queries per request over a run of requests by the same teacher: the first one loads the
+        principal with one joined query, the rest are answered from the principal cache. Run with
+        `-s` to see the numbers.
+    """
+    client = TestClient(app)
+    token = users_service.create_jwt_token(1, "teacher@example.com")
+    requests = 100
+
+    for _ in range(requests):
+        assert client.get("/teacher", headers={"token": token}).status_code == 200
+
+    print(f"\nauth queries: {len(queries)} for {requests} requests ({len(queries) / requests:.2f} per request)")
+    assert len(queries) == 1
+
+
+def test_principal_is_resolved_once_per_request(queries, monkeypatch):
+    calls = []
+
+    async def counting_get_principal(user_id):
+        calls.append(user_id)
+        return await users_service.get_principal(user_id)
+
+    monkeypatch.setattr("common.authentication.get_principal", counting_get_principal)
+    client = TestClient(app)
+    token = users_service.create_jwt_token(1, "teacher@example.com")
+
+    client.get("/teacher", headers={"token": token})
+
+    assert calls == [1]
@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+from common import catalogue_cache as catalogue_cache_module
+from common.catalogue_cache import CatalogueCache
+from data import async_database, database
+
+
+REPLICA = ("replica", 3306)
+
+
+def record_endpoints(monkeypatch) -> list:
+    endpoints = []
+
+    async def execute(endpoint, sql, sql_params=()):
+        endpoints.append((endpoint, sql.split()[1]))
+        return None, [(1, 7)] if "catalogue_version" in sql else [(1, "Course")]
+
+    monkeypatch.setattr(async_database, "_execute", execute)
+    monkeypatch.setattr(async_database.read_router, "choose", lambda: REPLICA)
+    return endpoints
+
+
+def test_version_and_rebuilt_body_are_read_from_the_primary(monkeypatch):
+    endpoints = record_endpoints(monkeypatch)
+    cache = CatalogueCache(check_interval=60)
+
+    async def build():
+        return await async_database.read_query("select course_id, title from courses")
+
+    async def scenario():
+        first = await cache.response("courses", build)
+        second = await cache.response("courses", build)
+        other = await async_database.read_query("select title from courses")
+        return first, second, other
+
+    first, second, _ = asyncio.run(scenario())
+
+    assert first.body == second.body == b'[[1,"Course"]]'
+    assert endpoints == [
+        (async_database.PRIMARY, "id,"),
+        (async_database.PRIMARY, "course_id,"),
+        (REPLICA, "title"),
+    ]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ratings_cache_checks_both_counters(monkeypatch):
+    versions = {1: 4, 2: 9}
+
+    async def read_query(sql, sql_params=(), primary=False):
+        return [(version_id, versions[version_id]) for version_id in sql_params]
+
+    monkeypatch.setattr(async_database, "read_query", read_query)
+    catalogue_cache = CatalogueCache(check_interval=0)
+    ratings_cache = CatalogueCache((1, 2), check_interval=0)
+
+    async def scenario():
+        before = await catalogue_cache.version(), await ratings_cache.version()
+        versions[2] += 1
+        return before, (await catalogue_cache.version(), await ratings_cache.version())
+
+    before, after = asyncio.run(scenario())
+
+    assert before == ((4,), (4, 9))
+    assert after == ((4,), (4, 10))
+
+
+def test_version_is_expired_only_when_the_change_commits(monkeypatch):
+    monkeypatch.setattr(catalogue_cache_module, "update_query", lambda sql, sql_params=(): 1)
+    monkeypatch.setattr(catalogue_cache_module, "insert_query", lambda sql, sql_params=(): 1)
+    cache = catalogue_cache_module.catalogue_cache
+    cache._checked_at = 100.0
+
+    session = database.begin_session()
+    session._pooled = SimpleNamespace(commit=lambda: None, rollback=lambda: None)
+    try:
+        catalogue_cache_module.bump_catalogue_version(1)
+        assert cache._checked_at == 100.0
+        session.commit()
+    finally:
+        database.end_session()
+
+    assert cache._checked_at == 0.0
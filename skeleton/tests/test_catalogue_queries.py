@@ -0,0 +1,132 @@
+import asyncio
+import re
+import sqlite3
+import time
+
+from common.pagination import PageRequest
+from services import courses_service, tag_services
+
+
+BENCHMARK_COURSES = 100_000
+BENCHMARK_ENROLLMENTS = 1_000_000
+BENCHMARK_STUDENTS = 10_000
+
+# The student catalogue before it was merged into one query: every enrolled course, then every public
+# course the student is not enrolled in.
+ENROLLED_QUERY = """
+select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.rating
+from courses c
+join enrollments e on c.course_id = e.courses_course_id
+where e.students_student_id = ?
+"""
+NOT_ENROLLED_QUERY = """
+select c.course_id, c.title, c.description, c.objectives, c.owner_id, c.is_premium, c.rating
+from courses c
+where c.is_premium = 0
+and not exists (
+    select 1
+    from enrollments e
+    where e.courses_course_id = c.course_id
+    and e.students_student_id = ?
+)
+"""
+
+
+def capture_queries(rows: list) -> tuple[list, callable]:
+    queries = []
+
+    async def read_query(sql, sql_params=()):
+        queries.append((sql, sql_params))
+        return rows
+
+    return queries, read_query
+
+
+def test_student_catalogue_page_is_one_query(monkeypatch):
+    rows = [(course_id, f"Course {course_id}", "d", "o", 1, 0, 0.0, course_id % 2) for course_id in range(1, 4)]
+    queries, read_query = capture_queries(rows)
+    monkeypatch.setattr(courses_service.async_database, "read_query", read_query)
+    page = PageRequest("id", courses_service.STUDENT_COURSE_SORTS["id"], limit=2)
+
+    result = asyncio.run(courses_service.get_all_student_courses(7, page))
+
+    assert len(queries) == 1
+    assert [(course.course_id, course.enrolled) for course in result.items] == [(1, True), (2, False)]
+    assert result.next is not None
+
+
+def test_courses_with_tags_page_is_one_query(monkeypatch):
+    rows = [(1, "Python", 1, "Programming"), (1, "Python", 2, "Web"), (2, "Rust", None, None)]
+    queries, read_query = capture_queries(rows)
+    monkeypatch.setattr(tag_services.async_database, "read_query", read_query)
+    page = PageRequest("id", tag_services.CATALOGUE_SORTS["id"])
+
+    result = asyncio.run(tag_services.get_all_courses_with_tags(page))
+
+    assert len(queries) == 1
+    assert result.items == [
+        {"course_id": 1, "course_name": "Python", "tags": [(1, "Programming"), (2, "Web")]},
+        {"course_id": 2, "course_name": "Rust", "tags": []},
+    ]
+
+
+def create_benchmark_database() -> sqlite3.Connection:
+    db = sqlite3.connect(":memory:")
+    db.executescript("""
+        create table courses (course_id integer primary key, title text, description text, objectives text,
+                              owner_id integer, is_premium integer, rating real);
+        create index is_premium_course_id_idx on courses (is_premium, course_id);
+        create table enrollments (students_student_id integer, courses_course_id integer,
+                                  primary key (students_student_id, courses_course_id));
+        create index courses_course_id_idx on enrollments (courses_course_id);
+    """)
+    # Generated in SQL: a million rows inserted from Python would dominate the test's run time.
+    db.execute("""
+        with recursive n(i) as (select 1 union all select i + 1 from n where i < ?)
+        insert into courses
+        select i, 'Course ' || i, 'description', 'objectives', 1, abs(random()) % 10 < 3, 0 from n""",
+               (BENCHMARK_COURSES,))
+    db.execute("""
+        with recursive n(i) as (select 1 union all select i + 1 from n where i < ?)
+        insert or ignore into enrollments
+        select abs(random()) % ? + 1, abs(random()) % ? + 1 from n""",
+               (BENCHMARK_ENROLLMENTS, BENCHMARK_STUDENTS, BENCHMARK_COURSES))
+    return db
+
+
+def to_sqlite(sql: str) -> str:
+    # SQLite does not accept parenthesized union branches; wrapping them in subqueries is equivalent.
+    sql = re.sub(r"\(\s*\(\s*select", "(select * from (select", sql, count=1)
+    return re.sub(r"\)\s*union all\s*\(\s*select", ") union all select * from (select", sql)
+
+
+def test_student_catalogue_benchmark(monkeypatch):
+    """
+        Time per student catalogue view at BENCHMARK_COURSES courses and BENCHMARK_ENROLLMENTS
+        enrollments, before (two queries returning every visible course) and after (one query per
+        page), on an in-memory SQLite copy of the tables and indexes. Run with `-s` to see the numbers.
+    """
+    db = create_benchmark_database()
+    queries, read_query = capture_queries([])
+    monkeypatch.setattr(courses_service.async_database, "read_query", read_query)
+    students = range(1, 11)
+
+    started = time.perf_counter()
+    before_rows = 0
+    for student_id in students:
+        before_rows += len(db.execute(ENROLLED_QUERY, (student_id,)).fetchall())
+        before_rows += len(db.execute(NOT_ENROLLED_QUERY, (student_id,)).fetchall())
+    before = (time.perf_counter() - started) / len(students)
+
+    started = time.perf_counter()
+    for student_id in students:
+        page = PageRequest("id", courses_service.STUDENT_COURSE_SORTS["id"])
+        asyncio.run(courses_service.get_all_student_courses(student_id, page))
+        sql, params = queries[-1]
+        assert len(db.execute(to_sqlite(sql), params).fetchall()) == page.fetch_limit
+    after = (time.perf_counter() - started) / len(students)
+
+    print(f"\nstudent catalogue at {BENCHMARK_COURSES} courses / {BENCHMARK_ENROLLMENTS} enrollments: "
+          f"{before * 1000:.1f} ms and {before_rows // len(students)} rows before, "
+          f"{after * 1000:.2f} ms and one page after")
+    assert after < before / 10
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import pytest
+from mariadb import OperationalError
+
+from data.connection_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, prepared: bool):
+        self.prepared = prepared
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+        self.rollbacks = 0
+        self.cursors: list[FakeCursor] = []
+
+    def cursor(self, prepared=False):
+        self.cursors.append(FakeCursor(prepared))
+        return self.cursors[-1]
+
+    def ping(self):
+        if not self.healthy:
+            raise OperationalError("server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def create_pool(**kwargs) -> tuple[ConnectionPool, list[FakeConnection]]:
+    connections = []
+
+    def connect():
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    return ConnectionPool(connect, **kwargs), connections
+
+
+def test_released_connection_is_reused_and_rolled_back():
+    pool, connections = create_pool(max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert second is first
+    assert len(connections) == 1
+    assert connections[0].rollbacks == 2
+    assert pool.stats()["borrow_count"] == 2
+
+
+def test_borrow_times_out_when_the_pool_is_exhausted():
+    pool, _ = create_pool(max_size=1, borrow_timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeout_count"] == 1
+
+
+def test_waiting_borrower_gets_the_released_connection():
+    pool, connections = create_pool(max_size=1, borrow_timeout=5)
+    held = pool.acquire()
+    borrowed = []
+
+    waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while pool.stats()["waiting"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    pool.release(held)
+    waiter.join(timeout=5)
+
+    assert borrowed == [held]
+    assert len(connections) == 1
+    assert pool.stats()["wait_count"] == 1
+    assert pool.stats()["waiting"] == 0
+
+
+def test_broken_connections_are_replaced():
+    pool, connections = create_pool(max_size=1)
+    with pool.connection():
+        pass
+    connections[0].healthy = False
+
+    with pool.connection() as pooled:
+        assert pooled.connection is connections[1]
+    assert connections[0].closed
+
+    with pytest.raises(OperationalError):
+        with pool.connection():
+            raise OperationalError("lost connection")
+    assert connections[1].closed
+    assert pool.stats()["size"] == 0
+
+
+def test_min_size_connections_are_not_opened_ahead_of_time():
+    pool, connections = create_pool(min_size=2, max_size=3)
+
+    assert connections == []
+    with pool.connection():
+        pass
+    assert pool.stats()["size"] == 1
+
+
+def test_idle_connections_beyond_min_size_are_pruned():
+    pool, connections = create_pool(min_size=1, max_size=3, idle_timeout=0)
+    held = [pool.acquire() for _ in range(3)]
+    for pooled in held:
+        pool.release(pooled)
+
+    pool.prune()
+
+    assert pool.stats()["size"] == 1
+    assert sum(connection.closed for connection in connections) == 2
+
+
+def test_prepared_statements_are_reused_per_connection():
+    pool, connections = create_pool(statement_cache_size=2)
+
+    with pool.connection() as pooled:
+        first = pooled.prepared_cursor("select 1")
+        assert pooled.prepared_cursor("select 1") is first
+    with pool.connection() as pooled:
+        assert pooled.prepared_cursor("select 1") is first
+
+    assert first.prepared
+    assert len(connections[0].cursors) == 1
+    assert pool.stats()["statement_cache"] == {"max_size": 2, "hits": 2, "misses": 1, "evictions": 0}
+
+
+def test_least_recently_used_statement_is_evicted():
+    pool, connections = create_pool(statement_cache_size=2)
+
+    with pool.connection() as pooled:
+        first = pooled.prepared_cursor("select 1")
+        second = pooled.prepared_cursor("select 2")
+        pooled.prepared_cursor("select 1")
+        pooled.prepared_cursor("select 3")
+
+        assert second.closed and not first.closed
+        assert pooled.prepared_cursor("select 1") is first
+        assert pooled.prepared_cursor("select 2") is not second
+
+    assert pool.stats()["statement_cache"]["evictions"] == 2
+
+
+def test_statement_cache_can_be_disabled():
+    pool, connections = create_pool(statement_cache_size=0)
+
+    with pool.connection() as pooled:
+        assert pooled.prepared_cursor("select 1") is not pooled.prepared_cursor("select 1")
+
+    assert not any(cursor.prepared for cursor in connections[0].cursors)
+
+
+def test_statement_cache_is_dropped_with_a_connection_that_failed_its_ping():
+    pool, connections = create_pool(max_size=1, statement_cache_size=2)
+    with pool.connection() as pooled:
+        stale = pooled.prepared_cursor("select 1")
+    connections[0].healthy = False
+
+    with pool.connection() as replacement:
+        cursor = replacement.prepared_cursor("select 1")
+
+    assert replacement is not pooled
+    assert cursor is not stale
+    assert connections[1].cursors == [cursor]
+    assert connections[0].closed
+    assert pooled.prepared_cursor("select 1") is not stale
+    assert pool.stats()["statement_cache"]["misses"] == 3
@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.authentication import current_student, current_teacher
+from data.models import Student, Teacher
+from routers.courses import courses_router
+from routers.sections import sections_router
+from services import courses_service, sections_service
+
+
+TEACHER = Teacher(teacher_id=10, email="teacher@example.com", first_name="Ana", last_name="Petrova",
+                  password="hash", users_user_id=1)
+STUDENT = Student(student_id=20, email="student@example.com", first_name="Pavel", last_name="Ivanov",
+                  password="hash", users_user_id=2)
+
+app = FastAPI()
+app.include_router(courses_router)
+app.include_router(sections_router)
+app.dependency_overrides[current_teacher] = lambda: TEACHER
+app.dependency_overrides[current_student] = lambda: STUDENT
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db(monkeypatch) -> sqlite3.Connection:
+    """
+        Runs the course and section queries of both the sync and the async database layer against
+        one in-memory SQLite database holding a course of `TEACHER` with a single section.
+    """
+    db = sqlite3.connect(":memory:", check_same_thread=False)
+    db.executescript("""
+        create table teachers (teacher_id integer primary key, users_user_id integer);
+        create table courses (course_id integer primary key, title text, description text, objectives text,
+                              owner_id integer, is_premium integer, rating real, revision integer default 0);
+        create table sections (section_id integer primary key, title text, content text, description text,
+                               external_resource text, course_id integer);
+        create table enrollments (students_student_id integer, courses_course_id integer);
+        insert into teachers values (10, 1);
+        insert into courses values (1, 'Python basics', 'Learn Python', 'Write scripts', 10, 0, 0, 0);
+        insert into sections values (1, 'Variables', 'Names for values', null, null, 1);
+    """)
+
+    def read_query(sql, sql_params=(), primary=False):
+        return db.execute(sql, sql_params).fetchall()
+
+    async def async_read_query(sql, sql_params=(), primary=False):
+        return read_query(sql, sql_params)
+
+    def insert_query(sql, sql_params=()):
+        return db.execute(sql, sql_params).lastrowid
+
+    def update_query(sql, sql_params=()):
+        return db.execute(sql, sql_params).rowcount
+
+    monkeypatch.setattr(courses_service, "read_query", read_query)
+    monkeypatch.setattr(courses_service.async_database, "read_query", async_read_query)
+    monkeypatch.setattr(sections_service, "read_query", read_query)
+    monkeypatch.setattr(sections_service, "insert_query", insert_query)
+    monkeypatch.setattr(sections_service, "update_query", update_query)
+    monkeypatch.setattr(sections_service, "delete_query", update_query)
+    return db
+
+
+SECTION = {"title": "Functions", "content": "Reusable code", "description": None, "external_resource": None}
+
+
+@pytest.mark.parametrize("path", ["/courses/1/teachers", "/courses/1/students"])
+def test_matching_if_none_match_is_not_modified(db, path):
+    first = client.get(path)
+    etag = first.headers["ETag"]
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_etag_depends_on_the_section_order_and_filter(db):
+    etag = client.get("/courses/1/teachers").headers["ETag"]
+
+    for params in ({"order": "desc"}, {"title": "Var"}):
+        response = client.get("/courses/1/teachers", params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("change", ["create", "update", "delete"])
+@pytest.mark.parametrize("path", ["/courses/1/teachers", "/courses/1/students"])
+def test_section_change_changes_the_course_etag(db, path, change):
+    etag = client.get(path).headers["ETag"]
+
+    if change == "create":
+        written = client.post("/sections/", json={"course_id": 1, **SECTION})
+    elif change == "update":
+        written = client.put("/sections/1", json=SECTION)
+    else:
+        written = client.delete("/sections/1")
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert written.status_code == 200
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert db.execute("select revision from courses where course_id = 1").fetchone() == (1,)
+    assert client.get(path, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
@@ -0,0 +1,42 @@
+import asyncio
+
+from common.pagination import PageRequest
+from services import courses_service
+
+
+def fake_read_query(courses: int, sections_per_course: int, queries: list):
+    async def read_query(sql, sql_params=()):
+        queries.append(sql)
+        if "from courses" in sql:
+            limit = sql_params[-1]
+            return [(course_id, f"Course {course_id}", "description", "objectives", 1, 0, 0.0, 0)
+                    for course_id in range(1, min(courses, limit) + 1)]
+        return [(course_id * 100 + index, f"Section {index}", "content", None, None, course_id)
+                for course_id in sql_params for index in range(sections_per_course)]
+
+    return read_query
+
+
+def test_teacher_courses_load_sections_in_one_query(monkeypatch):
+    for courses in (1, 10, 100):
+        queries = []
+        monkeypatch.setattr(courses_service.async_database, "read_query", fake_read_query(courses, 3, queries))
+        page = PageRequest("id", courses_service.TEACHER_COURSE_SORTS["id"], limit=100)
+
+        result = asyncio.run(courses_service.get_all_teacher_courses(1, page))
+
+        assert len(queries) == 2
+        assert len(result.items) == courses
+        assert all(len(course.sections) == 3 for course in result.items)
+        assert all(section.course_id == course.course_id for course in result.items for section in course.sections)
+
+
+def test_teacher_courses_without_courses_skip_the_sections_query(monkeypatch):
+    queries = []
+    monkeypatch.setattr(courses_service.async_database, "read_query", fake_read_query(0, 3, queries))
+    page = PageRequest("id", courses_service.TEACHER_COURSE_SORTS["id"])
+
+    result = asyncio.run(courses_service.get_all_teacher_courses(1, page))
+
+    assert len(queries) == 1
+    assert result.items == []
@@ -0,0 +1,67 @@
+from data import database
+from data.models import Principal, User
+from services import users_service
+
+
+class FakeConnection:
+    def __init__(self):
+        self.committed = False
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def begin_session_with_connection() -> tuple[database.RequestSession, FakeConnection]:
+    session = database.begin_session()
+    connection = FakeConnection()
+    session._pooled = connection
+    return session, connection
+
+
+def test_after_commit_runs_once_the_session_commits():
+    calls = []
+    session, connection = begin_session_with_connection()
+    try:
+        database.after_commit(lambda: calls.append(connection.committed))
+        assert calls == []
+        session.commit()
+    finally:
+        database.end_session()
+
+    assert calls == [True]
+
+
+def test_after_commit_is_dropped_on_rollback():
+    calls = []
+    session, _ = begin_session_with_connection()
+    try:
+        database.after_commit(lambda: calls.append(True))
+        session.rollback()
+    finally:
+        database.end_session()
+
+    assert calls == []
+
+
+def test_after_commit_runs_at_once_outside_a_session():
+    calls = []
+    database.after_commit(lambda: calls.append(True))
+
+    assert calls == [True]
+
+
+def test_principal_is_invalidated_after_commit():
+    user = User(user_id=7, email="teacher@example.com", password="hash")
+    users_service.principal_cache.set(7, Principal(user=user))
+    session, _ = begin_session_with_connection()
+    try:
+        users_service.invalidate_principal(7)
+        assert users_service.principal_cache.get(7) is not None
+        session.commit()
+    finally:
+        database.end_session()
+
+    assert users_service.principal_cache.get(7) is None
@@ -0,0 +1,110 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.authentication import current_teacher
+from data.models import Teacher
+from routers.enrollments import enrollments_router
+from services import enrollments_service
+
+
+TEACHER = Teacher(teacher_id=10, email="teacher@example.com", first_name="Ana", last_name="Petrova",
+                  password="hash", users_user_id=1)
+
+REPORT_ROWS = [
+    (1, "Pavel", "Ivanov", "p.ivanov@example.com", 7, "Python basics", datetime(2024, 3, 1, 9, 30)),
+    (2, "Maria", "Georgieva", "m.georgieva@example.com", 7, "Python basics", datetime(2024, 4, 2, 14, 0)),
+    (3, "Ivan", "Dimitrov", "i.dimitrov@example.com", 8, "Rust, safely", datetime(2024, 5, 3, 8, 15)),
+]
+
+app = FastAPI()
+app.include_router(enrollments_router)
+app.dependency_overrides[current_teacher] = lambda: TEACHER
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def streamed(monkeypatch) -> list:
+    """
+        Replaces `stream_query` with one that yields `REPORT_ROWS` newer than the `enrolled_after`
+        parameter, if the query has one, and returns the list of (sql, params) it was called with.
+    """
+    calls = []
+
+    def stream_query(sql, sql_params=(), batch_size=None):
+        calls.append((sql, sql_params))
+        rows = REPORT_ROWS
+        if "e.enrolled_at > ?" in sql:
+            rows = [row for row in rows if row[-1] > sql_params[-1]]
+        return iter(rows)
+
+    monkeypatch.setattr(enrollments_service, "stream_query", stream_query)
+    return calls
+
+
+def test_csv_report_is_a_download_with_a_header_line(streamed):
+    response = client.get("/enrollments/reports/students", params={"format": "csv"},
+                          headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="students_report.csv"'
+    assert "content-encoding" not in response.headers
+    assert response.text.splitlines() == [
+        "student_id,first_name,last_name,email,course_id,course_title,enrolled_at",
+        "1,Pavel,Ivanov,p.ivanov@example.com,7,Python basics,2024-03-01 09:30:00",
+        "2,Maria,Georgieva,m.georgieva@example.com,7,Python basics,2024-04-02 14:00:00",
+        '3,Ivan,Dimitrov,i.dimitrov@example.com,8,"Rust, safely",2024-05-03 08:15:00',
+    ]
+    assert streamed[0][1] == (10,)
+
+
+def test_ndjson_report_has_one_student_per_line(streamed):
+    response = client.get("/enrollments/reports/students", params={"format": "ndjson"},
+                          headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    students = [json.loads(line) for line in response.text.splitlines()]
+    assert [student["student_id"] for student in students] == [1, 2, 3]
+    assert students[0] == {"student_id": 1, "first_name": "Pavel", "last_name": "Ivanov",
+                           "email": "p.ivanov@example.com", "course_id": 7, "course_title": "Python basics",
+                           "enrolled_at": "2024-03-01T09:30:00"}
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_report_is_gzipped_when_the_client_accepts_it(streamed, format):
+    plain = client.get("/enrollments/reports/students", params={"format": format},
+                       headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/enrollments/reports/students", params={"format": format},
+                         headers={"Accept-Encoding": "br, gzip;q=0.8"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert gzipped.content == plain.content
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_report_only_lists_enrollments_after_the_given_time(streamed, format):
+    response = client.get("/enrollments/reports/students",
+                          params={"format": format, "course_id": 7, "enrolled_after": "2024-03-15T00:00:00"},
+                          headers={"Accept-Encoding": "identity"})
+
+    sql, params = streamed[0]
+    assert "c.course_id = ?" in sql and "e.enrolled_at > ?" in sql
+    assert params == (10, 7, datetime(2024, 3, 15))
+    lines = response.text.splitlines()
+    assert len(lines) == (3 if format == "csv" else 2)
+    assert "Pavel" not in response.text
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_empty_report_is_not_found(streamed, format):
+    response = client.get("/enrollments/reports/students",
+                          params={"format": format, "enrolled_after": "2025-01-01T00:00:00"})
+
+    assert response.status_code == 404
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from common.pagination import PageRequest, SortKey, encode_cursor, paginated
+
+
+SORTS = {
+    "id": SortKey(("course_id",), lambda item: (item["course_id"],)),
+    "title": SortKey(("title", "course_id"), lambda item: (item["title"], item["course_id"])),
+}
+
+app = FastAPI()
+
+
+@app.get("/items")
+def list_items(page: PageRequest = Depends(paginated(SORTS, "id"))):
+    where, params = page.where()
+    return {"where": where, "params": list(params), "order_by": page.order_by}
+
+
+client = TestClient(app)
+
+
+def test_next_page_continues_after_the_last_item():
+    page = PageRequest("title", SORTS["title"], limit=2)
+    items = [{"course_id": 3, "title": "A"}, {"course_id": 1, "title": "B"}, {"course_id": 2, "title": "C"}]
+
+    first = page.page(items)
+
+    assert first.items == items[:2]
+    response = client.get("/items", params={"sort": "title", "cursor": first.next})
+    assert response.json() == {
+        "where": "((title > ?) or (title = ? and course_id > ?))",
+        "params": ["B", "B", 1],
+        "order_by": "title, course_id",
+    }
+
+
+def test_last_page_has_no_cursor():
+    page = PageRequest("id", SORTS["id"], limit=2)
+
+    assert page.page([{"course_id": 1}, {"course_id": 2}]).next is None
+
+
+def test_descending_pages_compare_with_less_than():
+    cursor = encode_cursor("id", True, (10,))
+
+    response = client.get("/items", params={"order": "desc", "cursor": cursor})
+
+    assert response.json()["where"] == "((course_id < ?))"
+    assert response.json()["order_by"] == "course_id desc"
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor("title", False, ("B", 1)),
+    encode_cursor("id", True, (1,)),
+    encode_cursor("id", False, (1, 2)),
+    encode_cursor("id", False, ({"course_id": 1},)),
+    encode_cursor("id", False, ([1],)),
+])
+def test_invalid_cursors_are_rejected(cursor):
+    assert client.get("/items", params={"cursor": cursor}).status_code == 400
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import pytest
+
+from common.passwords import PasswordHasher, PasswordHashingBusy
+
+
+def create_hasher(**kwargs) -> PasswordHasher:
+    options = {"rounds": 4, "workers": 1, "max_pending": 2, "queue_timeout": 0.1}
+    options.update(kwargs)
+    return PasswordHasher(**options)
+
+
+def test_hash_and_verify_round_trip():
+    hasher = create_hasher()
+
+    hashed = hasher.hash("secret")
+
+    assert hashed.startswith("$2b$04$")
+    assert hasher.verify("secret", hashed)
+    assert not hasher.verify("wrong", hashed)
+    assert asyncio.run(hasher.verify_async("secret", hashed))
+
+
+def test_async_callers_are_rejected_at_once_when_the_queue_is_full():
+    hasher = create_hasher(max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(hasher._run_async(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHashingBusy):
+            await hasher.hash_async("secret")
+        release.set()
+        await blocked
+        return await hasher.hash_async("secret")
+
+    assert asyncio.run(scenario()).startswith("$2b$")
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["completed"] == 2
+
+
+def test_slot_is_freed_when_the_waiting_request_is_cancelled():
+    hasher = create_hasher(max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        waiting = asyncio.ensure_future(hasher._run_async(release.wait))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        release.set()
+        while hasher.stats()["queue_depth"]:
+            await asyncio.sleep(0.01)
+        return await hasher.hash_async("secret")
+
+    assert asyncio.run(scenario()).startswith("$2b$")
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import mariadb
+import pytest
+
+from common import catalogue_cache
+from data import database
+from services import ratings_service
+
+
+class Deadlock(mariadb.OperationalError):
+    errno = ratings_service.ER_LOCK_DEADLOCK
+
+
+class FakeRatingsTables:
+    """
+        Stands in for `courses`, `course_ratings` and the catalogue counters, recording every statement.
+    """
+
+    def __init__(self):
+        self.ratings: dict[tuple[int, int], int] = {}
+        self.statements = []
+        self.locked_in_transaction = set()
+        self.fail_on = None
+
+    def read_query(self, sql, sql_params=(), primary=False):
+        self._record(sql, sql_params)
+        if "from course_ratings" in sql:
+            rating = self.ratings.get(sql_params)
+            return [] if rating is None else [(rating,)]
+        if "rating_count" in sql:
+            ratings = [rating for (_, course_id), rating in self.ratings.items() if course_id == sql_params[0]]
+            return [(round(sum(ratings) / len(ratings), 2), len(ratings))]
+        return [(sql_params[0],)]
+
+    def insert_query(self, sql, sql_params=()):
+        self._record(sql, sql_params)
+        if "into course_ratings" in sql:
+            student_id, course_id, rating = sql_params
+            self.ratings[(student_id, course_id)] = rating
+
+    def update_query(self, sql, sql_params=()):
+        self._record(sql, sql_params)
+
+    def _record(self, sql, sql_params):
+        sql = " ".join(sql.split())
+        self.statements.append((sql, sql_params))
+        if database.get_db_session() is not None:
+            self.locked_in_transaction.update(_locked_rows(sql, sql_params))
+        if self.fail_on is not None and self.fail_on in sql:
+            raise Deadlock("Deadlock found when trying to get lock")
+
+
+def _locked_rows(sql: str, sql_params: tuple) -> set:
+    """
+        The existing rows a statement locks until the transaction ends. Inserted rows are new and
+        lock nothing another rating could want.
+    """
+    if sql.startswith("update catalogue_version"):
+        return {("catalogue_version", sql_params[0])}
+    if sql.startswith("update courses") or (sql.startswith("select course_id from courses") and "for update" in sql):
+        return {("courses", sql_params[-1])}
+    if "course_ratings" in sql and ("for update" in sql or sql.startswith("insert")):
+        return {("course_ratings", sql_params[0], sql_params[1])}
+    return set()
+
+
+def rate_in_transaction(tables: FakeRatingsTables, student_id: int, course_id: int, rating: int) -> set:
+    tables.locked_in_transaction = set()
+    session = database.begin_session()
+    session._pooled = SimpleNamespace(commit=lambda: None, rollback=lambda: None)
+    try:
+        ratings_service.rate_course(student_id, course_id, rating)
+        locked = tables.locked_in_transaction
+        session.commit()
+    finally:
+        database.end_session()
+    return locked
+
+
+@pytest.fixture
+def tables(monkeypatch) -> FakeRatingsTables:
+    tables = FakeRatingsTables()
+    for module in (ratings_service, catalogue_cache):
+        for name in ("read_query", "insert_query", "update_query"):
+            if hasattr(module, name):
+                monkeypatch.setattr(module, name, getattr(tables, name))
+    return tables
+
+
+def test_rating_locks_the_course_before_reading_the_earlier_rating(tables):
+    ratings_service.rate_course(1, 10, 4)
+
+    assert tables.statements[0] == ("select course_id from courses where course_id = ? for update", (10,))
+    assert tables.statements[1][0].startswith("select rating from course_ratings")
+
+
+def test_new_and_replaced_ratings_update_the_running_sum(tables):
+    first = ratings_service.rate_course(1, 10, 4)
+    ratings_service.rate_course(2, 10, 2)
+    replaced = ratings_service.rate_course(1, 10, 5)
+
+    sums = [params for sql, params in tables.statements if sql.startswith("update courses")]
+    assert sums == [(4, 1, 4, 1, 10), (2, 1, 2, 1, 10), (1, 0, 1, 0, 10)]
+    assert (first.average_rating, first.rating_count) == (4.0, 1)
+    assert (replaced.average_rating, replaced.rating_count) == (3.5, 2)
+
+
+def test_rating_bumps_only_the_ratings_version(tables):
+    ratings_service.rate_course(1, 10, 4)
+
+    bumps = [params for sql, params in tables.statements if sql.startswith("update catalogue_version")]
+    changes = [params for sql, params in tables.statements if sql.startswith("insert into catalogue_changes")]
+    assert bumps == [(catalogue_cache.RATINGS_VERSION_ID,)]
+    assert [course_id for course_id, _ in changes] == [10]
+
+
+def test_deadlock_is_reported_as_conflict(tables):
+    tables.fail_on = "insert into course_ratings"
+
+    result = ratings_service.rate_course(1, 10, 4)
+
+    assert result.status_code == 409
+    assert not any(sql.startswith("update catalogue_version") for sql, _ in tables.statements)
+
+
+def test_ratings_of_different_courses_lock_no_shared_row(tables):
+    first = rate_in_transaction(tables, 1, 10, 4)
+    second = rate_in_transaction(tables, 2, 20, 5)
+
+    assert first == {("courses", 10), ("course_ratings", 1, 10)}
+    assert first.isdisjoint(second)
+    bumps = [params for sql, params in tables.statements if sql.startswith("update catalogue_version")]
+    assert bumps == [(catalogue_cache.RATINGS_VERSION_ID,)] * 2
@@ -0,0 +1,140 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common import middleware
+from common.middleware import WRITE_PIN_COOKIE, DatabaseSessionMiddleware
+from data import database
+from data.connection_pool import ConnectionPool
+from data.routing import ReadRouter
+
+
+class FakeCursor:
+    def __init__(self, name: str, log: list):
+        self.name = name
+        self.log = log
+        self.lastrowid = 1
+        self.rowcount = 1
+
+    def execute(self, sql, sql_params=()):
+        self.log.append((self.name, sql))
+
+    def __iter__(self):
+        return iter([])
+
+
+class FakeConnection:
+    def __init__(self, name: str, log: list):
+        self.name = name
+        self.log = log
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self.name, self.log)
+
+    def ping(self):
+        pass
+
+    def commit(self):
+        self.log.append((self.name, "commit"))
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def routed(monkeypatch) -> list:
+    """
+        Replaces the primary and replica pools with pools of fake connections and returns the log of
+        (endpoint, statement) pairs they receive.
+    """
+    log = []
+    primary = ConnectionPool(lambda: FakeConnection("primary", log), min_size=0, statement_cache_size=0)
+    replica = ConnectionPool(lambda: FakeConnection("replica", log), min_size=0, statement_cache_size=0)
+    monkeypatch.setattr(database, "pool", primary)
+    monkeypatch.setattr(database, "read_router", ReadRouter(primary, [replica]))
+    return log
+
+
+def test_round_robin_cycles_through_the_replicas():
+    router = ReadRouter("primary", ["r1", "r2", "r3"])
+
+    assert [router.choose() for _ in range(6)] == ["r1", "r2", "r3", "r1", "r2", "r3"]
+
+
+def test_least_connections_picks_the_idlest_replica_and_rotates_ties():
+    in_use = {"r1": 3, "r2": 1, "r3": 1}
+    router = ReadRouter("primary", ["r1", "r2", "r3"], "least_connections", in_use=in_use.get)
+
+    assert [router.choose() for _ in range(3)] == ["r2", "r2", "r3"]
+    in_use["r1"] = 0
+    assert router.choose() == "r1"
+
+
+def test_without_replicas_reads_go_to_the_primary():
+    assert ReadRouter("primary", []).choose() == "primary"
+    with pytest.raises(ValueError):
+        ReadRouter("primary", ["r1"], "random")
+
+
+def test_session_switches_to_the_primary_after_a_write(routed):
+    session = database.begin_session()
+    try:
+        database.read_query("select 1")
+        database.insert_query("insert into t values (1)")
+        database.read_query("select 2")
+        session.commit()
+    finally:
+        session.close()
+        database.end_session()
+
+    assert routed == [("replica", "select 1"), ("primary", "insert into t values (1)"),
+                      ("primary", "select 2"), ("primary", "commit")]
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(DatabaseSessionMiddleware, secret="test-secret", pin_seconds=5)
+
+    @app.post("/write")
+    def write():
+        database.insert_query("insert into t values (1)")
+        return {}
+
+    @app.get("/read")
+    def read():
+        database.read_query("select 1")
+        return {}
+
+    return app
+
+
+def test_write_pins_the_client_to_the_primary_on_every_worker(routed):
+    writer, other_worker = TestClient(create_app()), TestClient(create_app())
+
+    response = writer.post("/write")
+    other_worker.cookies.set(WRITE_PIN_COOKIE, response.cookies[WRITE_PIN_COOKIE])
+    routed.clear()
+    other_worker.get("/read")
+    TestClient(create_app()).get("/read")
+
+    assert [entry for entry in routed if entry[1] != "commit"] == [("primary", "select 1"), ("replica", "select 1")]
+
+
+def test_forged_or_expired_pins_are_ignored(routed, monkeypatch):
+    client = TestClient(create_app())
+    wrote_at = client.post("/write").cookies[WRITE_PIN_COOKIE]
+    timestamp, _, signature = wrote_at.rpartition(".")
+
+    client.cookies.set(WRITE_PIN_COOKIE, f"{float(timestamp) + 3600:.3f}.{signature}")
+    routed.clear()
+    client.get("/read")
+    assert routed == [("replica", "select 1")]
+
+    client.cookies.set(WRITE_PIN_COOKIE, wrote_at)
+    monkeypatch.setattr(middleware.time, "time", lambda: float(timestamp) + 6)
+    routed.clear()
+    client.get("/read")
+    assert routed == [("replica", "select 1")]
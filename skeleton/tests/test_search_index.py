@@ -0,0 +1,120 @@
+import random
+import time
+
+from common.search_index import CourseDocument, CourseSearchIndex, tokenize
+
+
+def create_index(*documents: CourseDocument) -> CourseSearchIndex:
+    index = CourseSearchIndex()
+    for document in documents:
+        index.add(document)
+    return index
+
+
+def ranked_ids(results) -> list[int]:
+    return [document.course_id for _, document in sorted(results, key=lambda result: -result[0])]
+
+
+def test_tokenize_lowercases_and_splits_on_non_word_characters():
+    assert tokenize("Intro to SQL: joins, indexes!") == ["intro", "to", "sql", "joins", "indexes"]
+    assert tokenize(None) == []
+
+
+def test_title_match_outranks_description_match():
+    index = create_index(
+        CourseDocument(1, "Cooking", "A python appears in the kitchen", "", False, 0),
+        CourseDocument(2, "Python", "Programming for beginners", "", False, 0),
+        CourseDocument(3, "Gardening", "Plants", "", False, 0),
+    )
+
+    assert ranked_ids(index.search("python")) == [2, 1]
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = create_index(
+        CourseDocument(1, "Python web", "", "", False, 0),
+        CourseDocument(2, "Python data", "", "", False, 0),
+        CourseDocument(3, "Python scripting", "", "", False, 0),
+    )
+
+    results = {document.course_id: score for score, document in index.search("python web")}
+    only_python = {document.course_id: score for score, document in index.search("python")}
+
+    assert list(results) == [1]
+    assert results[1] > only_python[1]
+
+
+def test_query_matches_only_courses_with_every_term_tag_and_rating():
+    index = create_index(
+        CourseDocument(1, "Python web", "", "", False, 4.0, ["Web"]),
+        CourseDocument(2, "Python web", "", "", False, 2.0, ["Web"]),
+        CourseDocument(3, "Python web", "", "", False, 5.0, ["Data"]),
+        CourseDocument(4, "Python", "", "", False, 5.0, ["Data"]),
+    )
+
+    assert ranked_ids(index.search("python web", tags=["web"], min_rating=3)) == [1]
+    assert index.search("missing") == []
+
+
+def test_replaced_and_removed_courses_leave_no_postings():
+    index = create_index(CourseDocument(1, "Python", "", "", False, 0, ["Web"]))
+
+    index.add(CourseDocument(1, "Rust", "", "", False, 0))
+    assert index.search("python") == []
+    assert index.search(None, tags=["web"]) == []
+    assert ranked_ids(index.search("rust")) == [1]
+
+    index.remove(1)
+    assert len(index) == 0
+    assert index.search("rust") == []
+
+
+def test_limit_keeps_the_best_results_in_key_order():
+    index = create_index(*(CourseDocument(course_id, "Python", "", "", False, course_id) for course_id in range(1, 6)))
+
+    results = index.search("python", key=lambda score, document: (document.rating, document.course_id), limit=2,
+                           descending=True)
+
+    assert [document.course_id for _, document in results] == [5, 4]
+
+
+BENCHMARK_COURSES = 100_000
+BENCHMARK_QUERIES = ["python", "web security", "data analysis python"]
+
+
+def like_scan(documents: list[CourseDocument], query: str) -> list[CourseDocument]:
+    patterns = query.lower().split()
+    return [document for document in documents
+            if all(any(pattern in (text or "").lower() for text in (document.title, document.description,
+                                                                    document.objectives))
+                   for pattern in patterns)]
+
+
+def test_search_benchmark():
+    """
+        Query time of the index against the `like '%term%'` scan it replaces, over BENCHMARK_COURSES
+        generated courses. The scan stands in for the database's: it reads every course for every
+        query. Run with `-s` to see the numbers.
+    """
+    generator = random.Random(23)
+    words = [f"word{index}" for index in range(5_000)] + ["python", "web", "security", "data", "analysis"]
+    documents = [CourseDocument(course_id, " ".join(generator.choices(words, k=4)),
+                                " ".join(generator.choices(words, k=12)), " ".join(generator.choices(words, k=6)),
+                                False, 0)
+                 for course_id in range(1, BENCHMARK_COURSES + 1)]
+    index = create_index(*documents)
+
+    started = time.perf_counter()
+    scanned = [like_scan(documents, query) for query in BENCHMARK_QUERIES]
+    scan = (time.perf_counter() - started) / len(BENCHMARK_QUERIES)
+
+    started = time.perf_counter()
+    found = [index.search(query, key=lambda score, document: (score, document.course_id), limit=50, descending=True)
+             for query in BENCHMARK_QUERIES]
+    indexed = (time.perf_counter() - started) / len(BENCHMARK_QUERIES)
+
+    print(f"\nsearch over {BENCHMARK_COURSES} courses: {scan * 1000:.1f} ms per LIKE scan, "
+          f"{indexed * 1000:.2f} ms per index query")
+    for matches, results in zip(scanned, found):
+        assert {document.course_id for _, document in results} <= {document.course_id for document in matches}
+    assert indexed < scan / 10
@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+from data import async_database
+from services import search_service
+from services.search_service import CourseSearch
+
+
+REPLICA = ("replica", 3306)
+
+
+class FakeCatalogue:
+    """
+        Stands in for the `courses`, `course_tags` and `catalogue_changes` tables and records which
+        endpoint every statement was sent to.
+    """
+
+    def __init__(self):
+        self.courses = {1: ("Python basics", "Learn Python", "", 0, 4.5)}
+        self.tags = [(1, "Programming")]
+        self.changes: list[tuple[int, int]] = []
+        self.unsettled_ids: set[int] = set()
+        self.endpoints = []
+
+    async def execute(self, endpoint, sql, sql_params=()):
+        self.endpoints.append(endpoint)
+        if sql.startswith("delete"):
+            return SimpleNamespace(rowcount=0), []
+        if "max(id)" in sql:
+            unsettled = self.unsettled_ids if "changed_at" in sql else set()
+            settled = [change_id for change_id, _ in self.changes if change_id not in unsettled]
+            return None, [(max(settled, default=0),)]
+        if "from catalogue_changes" in sql:
+            return None, sorted(change for change in self.changes if change[0] > sql_params[0])
+        if "from courses" in sql:
+            return None, [(course_id, *row) for course_id, row in self.courses.items()
+                          if not sql_params or course_id in sql_params]
+        return None, [row for row in self.tags if not sql_params or row[0] in sql_params]
+
+
+def create_search(monkeypatch, catalogue: FakeCatalogue, **kwargs) -> CourseSearch:
+    monkeypatch.setattr(async_database, "_execute", catalogue.execute)
+    monkeypatch.setattr(async_database.read_router, "choose", lambda: REPLICA)
+    versions = iter(range(1, 100))
+
+    async def version():
+        return next(versions)
+
+    monkeypatch.setattr(search_service.catalogue_cache, "version", version)
+    return CourseSearch(refresh_interval=0, **kwargs)
+
+
+def test_change_feed_and_reindex_read_from_the_primary(monkeypatch):
+    catalogue = FakeCatalogue()
+    search = create_search(monkeypatch, catalogue)
+
+    async def scenario():
+        await search.refresh()
+        catalogue.courses[1] = ("Advanced Python", "Learn Python", "", 0, 4.5)
+        catalogue.changes.append((1, 1))
+        await search.refresh()
+
+    asyncio.run(scenario())
+
+    assert set(catalogue.endpoints) == {async_database.PRIMARY}
+    assert search.index.get(1).title == "Advanced Python"
+    assert search.stats()["last_change_id"] == 1
+
+
+def test_first_build_re_applies_changes_newer_than_the_settle_time(monkeypatch):
+    catalogue = FakeCatalogue()
+    catalogue.changes = [(1, 1), (3, 1)]
+    catalogue.unsettled_ids = {3}
+    search = create_search(monkeypatch, catalogue)
+
+    async def scenario():
+        await search.refresh()
+        gap_position = search.stats()["last_change_id"]
+        catalogue.courses[2] = ("Rust", "Learn Rust", "", 0, 4.0)
+        catalogue.changes.append((2, 2))
+        await search.refresh()
+        return gap_position
+
+    assert asyncio.run(scenario()) == 1
+    assert search.index.get(2).title == "Rust"
+    assert search.stats()["last_change_id"] == 3
+
+
+def test_rebuild_keeps_a_pending_gap(monkeypatch):
+    catalogue = FakeCatalogue()
+    search = create_search(monkeypatch, catalogue, rebuild_interval=3600)
+
+    async def scenario():
+        await search.refresh()
+        catalogue.changes.append((2, 1))
+        await search.refresh()
+        search.rebuild_interval = 0
+        await search.refresh()
+        search.rebuild_interval = 3600
+        catalogue.courses[2] = ("Rust", "Learn Rust", "", 0, 4.0)
+        catalogue.changes.append((1, 2))
+        await search.refresh()
+
+    asyncio.run(scenario())
+
+    assert search.stats()["last_change_id"] == 2
+    assert search.index.get(2).title == "Rust"
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from data.settings import DatabaseEndpoint, DatabaseSettings
+
+
+@pytest.fixture
+def settings_file(tmp_path) -> str:
+    path = tmp_path / "database.json"
+    path.write_text(json.dumps({
+        "host": "db-primary",
+        "pool_max_size": 40,
+        "read_strategy": "least_connections",
+        "replicas": [{"host": "db-replica-1"}, {"host": "db-replica-2", "port": 3307}],
+    }))
+    return str(path)
+
+
+def test_defaults_without_file_or_environment():
+    settings = DatabaseSettings.load(environ={})
+
+    assert settings == DatabaseSettings()
+    assert settings.primary == DatabaseEndpoint(host="localhost", port=3306)
+    assert settings.replicas == []
+
+
+def test_settings_are_loaded_from_the_json_file(settings_file):
+    settings = DatabaseSettings.load(environ={"POODLE_DB_SETTINGS_FILE": settings_file})
+
+    assert settings.host == "db-primary"
+    assert settings.pool_max_size == 40
+    assert settings.read_strategy == "least_connections"
+    assert [replica.name for replica in settings.replicas] == ["db-replica-1:3306", "db-replica-2:3307"]
+    assert settings.pool_min_size == DatabaseSettings().pool_min_size
+
+
+def test_environment_overrides_the_json_file(settings_file):
+    settings = DatabaseSettings.load(environ={
+        "POODLE_DB_SETTINGS_FILE": settings_file,
+        "POODLE_DB_POOL_MAX_SIZE": "8",
+        "POODLE_DB_REPLICAS": "db-replica-3:3308, db-replica-4",
+        "POODLE_DB_STATEMENT_TIMEOUT_SECONDS": "2.5",
+        "POODLE_DB_SSL": "true",
+    })
+
+    assert settings.host == "db-primary"
+    assert settings.pool_max_size == 8
+    assert [replica.name for replica in settings.replicas] == ["db-replica-3:3308", "db-replica-4:3306"]
+    assert settings.statement_timeout_seconds == 2.5
+    assert settings.ssl is True
+
+
+@pytest.mark.parametrize("name, value", [
+    ("POODLE_DB_POOL_MAX_SIZE", "many"),
+    ("POODLE_DB_POOL_MAX_SIZE", "0"),
+    ("POODLE_DB_POOL_MIN_SIZE", "-1"),
+    ("POODLE_DB_POOL_MIN_SIZE", "50"),
+    ("POODLE_DB_READ_STRATEGY", "random"),
+    ("POODLE_DB_REPLICAS", "db-replica-1:replica"),
+    ("POODLE_DB_STREAM_BATCH_SIZE", "0"),
+])
+def test_invalid_values_are_rejected(name, value):
+    with pytest.raises(ValidationError):
+        DatabaseSettings.load(environ={name: value})
+
+
+def test_missing_settings_file_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DatabaseSettings.load(environ={"POODLE_DB_SETTINGS_FILE": str(tmp_path / "missing.json")})
@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+
+from mariadb import OperationalError
+
+from common.streaming import csv_response, ndjson_response, non_empty
+from data import database
+from data.connection_pool import ConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, rows, fail_after: int | None = None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.position = 0
+        self.fetches = 0
+        self.closed = False
+
+    def execute(self, sql, sql_params=()):
+        pass
+
+    def fetchmany(self, size):
+        if self.fail_after is not None and self.position >= self.fail_after:
+            raise OperationalError("lost connection")
+        self.fetches += 1
+        batch = self.rows[self.position:self.position + size]
+        self.position += len(batch)
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor: FakeCursor):
+        self._cursor = cursor
+        self.buffered = None
+        self.closed = False
+
+    def cursor(self, buffered=True):
+        self.buffered = buffered
+        return self._cursor
+
+    def ping(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def create_pool(cursor: FakeCursor) -> tuple[ConnectionPool, FakeConnection]:
+    connection = FakeConnection(cursor)
+    return ConnectionPool(lambda: connection, max_size=1), connection
+
+
+def test_rows_are_fetched_in_batches_while_they_are_consumed():
+    cursor = FakeCursor([(row,) for row in range(10)])
+    pool, connection = create_pool(cursor)
+
+    rows = database._stream_rows(pool, "select id from courses", (), batch_size=3)
+    assert pool.stats()["borrowed"] == 0
+
+    assert next(rows) == (0,)
+    assert connection.buffered is False
+    assert cursor.fetches == 1
+    assert pool.stats()["borrowed"] == 1
+
+    assert list(rows) == [(row,) for row in range(1, 10)]
+    assert cursor.fetches == 5
+    assert cursor.closed
+    assert pool.stats()["borrowed"] == 0
+
+
+def test_connection_is_released_when_iteration_stops_early():
+    cursor = FakeCursor([(row,) for row in range(10)])
+    pool, connection = create_pool(cursor)
+
+    rows = database._stream_rows(pool, "select id from courses", (), batch_size=3)
+    next(rows)
+    rows.close()
+
+    assert cursor.closed
+    assert cursor.position == 3
+    assert pool.stats()["borrowed"] == 0
+    assert pool.stats()["idle"] == 1
+    assert not connection.closed
+
+
+def test_connection_is_discarded_when_it_breaks_mid_stream():
+    cursor = FakeCursor([(row,) for row in range(10)], fail_after=3)
+    pool, connection = create_pool(cursor)
+
+    rows = database._stream_rows(pool, "select id from courses", (), batch_size=3)
+    consumed = []
+    try:
+        for row in rows:
+            consumed.append(row)
+    except OperationalError:
+        pass
+
+    assert consumed == [(0,), (1,), (2,)]
+    assert connection.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_non_empty_keeps_the_first_item():
+    assert non_empty(iter([])) is None
+    assert list(non_empty(iter([1, 2]))) == [1, 2]
+
+
+def _body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_csv_and_ndjson_responses():
+    csv = csv_response(("id", "title"), iter([(1, "Python"), (2, "Rust, safely")]), "courses.csv")
+    assert csv.headers["content-disposition"] == 'attachment; filename="courses.csv"'
+    assert _body(csv) == b'id,title\r\n1,Python\r\n2,"Rust, safely"\r\n'
+
+    ndjson = ndjson_response(iter([{"id": 1}, {"id": 2}]), gzip=True)
+    assert ndjson.headers["content-encoding"] == "gzip"
+    assert ndjson.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(_body(ndjson)) == b'{"id": 1}\n{"id": 2}\n'
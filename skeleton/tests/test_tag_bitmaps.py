@@ -0,0 +1,51 @@
+from common.tag_bitmaps import TagBitmapIndex, iter_bits
+
+
+COURSES = [
+    (1, ["Python", "Web"], False),
+    (2, ["Python", "Data"], True),
+    (3, ["Web"], False),
+    (70, ["data"], True),
+]
+
+
+def course_ids(bits: int) -> list[int]:
+    return list(iter_bits(bits))
+
+
+def test_iter_bits_in_both_directions():
+    bits = (1 << 3) | (1 << 70) | 1
+
+    assert list(iter_bits(bits)) == [0, 3, 70]
+    assert list(iter_bits(bits, descending=True)) == [70, 3, 0]
+
+
+def test_match_combines_all_any_none_and_premium():
+    index = TagBitmapIndex.from_courses(COURSES)
+
+    assert course_ids(index.match(all_tags=["python", "WEB"])) == [1]
+    assert course_ids(index.match(any_tags=["web", "data"])) == [1, 2, 3, 70]
+    assert course_ids(index.match(any_tags=["data"], no_tags=["python"])) == [70]
+    assert course_ids(index.match(is_premium=False)) == [1, 3]
+    assert course_ids(index.match(all_tags=["missing"])) == []
+
+
+def test_facets_count_the_matching_courses_per_tag():
+    index = TagBitmapIndex.from_courses(COURSES)
+
+    assert index.facets(index.match(any_tags=["python"])) == {"Python": 2, "Web": 1, "Data": 1}
+
+
+def test_incremental_updates_match_a_fresh_build():
+    index = TagBitmapIndex()
+    for course_id, tags, is_premium in COURSES:
+        index.add(course_id, tags, is_premium)
+    index.add(2, ["Web"], False)
+    index.remove(70)
+
+    rebuilt = TagBitmapIndex.from_courses([(1, ["Python", "Web"], False), (2, ["Web"], False), (3, ["Web"], False)])
+
+    assert index.all_courses == rebuilt.all_courses
+    assert index.premium == rebuilt.premium == 0
+    assert all(index.tag(name) == rebuilt.tag(name) for name in ("python", "web", "data"))
+    assert len(index) == len(rebuilt) == 2
@@ -0,0 +1,109 @@
+from common import token_blacklist
+from common.token_blacklist import BloomFilter, DatabaseTokenBlacklist, token_fingerprint
+from data import database
+
+
+class FakeBlacklistTable:
+    """
+        Stands in for the `token_blacklist` table. `visible` holds the committed rows by id.
+    """
+
+    def __init__(self):
+        self.visible: dict[int, str] = {}
+        self.on_full_read = None
+        self.deleted_in_session = []
+
+    def read_query(self, sql, sql_params=()):
+        if "select 1 from token_blacklist" in sql:
+            return [(1,)] if sql_params[0] in self.visible.values() else []
+        if "where id > ?" in sql:
+            return [(row_id, fingerprint) for row_id, fingerprint in sorted(self.visible.items())
+                    if row_id > sql_params[0]]
+        if self.on_full_read is not None:
+            self.on_full_read()
+        return sorted(self.visible.items())
+
+    def delete_query(self, sql, sql_params=()):
+        self.deleted_in_session.append(database.get_db_session() is not None)
+        return 0
+
+
+def create_blacklist(monkeypatch, table: FakeBlacklistTable, **kwargs) -> DatabaseTokenBlacklist:
+    monkeypatch.setattr(token_blacklist, "read_query", table.read_query)
+    monkeypatch.setattr(token_blacklist, "delete_query", table.delete_query)
+    return DatabaseTokenBlacklist(refresh_interval=0, **kwargs)
+
+
+def test_bloom_filter_contains_added_fingerprints():
+    bloom = BloomFilter(1000)
+    fingerprints = [token_fingerprint(f"token-{i}") for i in range(1000)]
+    for fingerprint in fingerprints:
+        bloom.add(fingerprint)
+
+    assert all(bloom.might_contain(fingerprint) for fingerprint in fingerprints)
+    false_positives = sum(bloom.might_contain(token_fingerprint(f"other-{i}")) for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_rebuild_keeps_blacklisted_tokens_visible(monkeypatch):
+    table = FakeBlacklistTable()
+    table.visible[1] = token_fingerprint("logged-out")
+    blacklist = create_blacklist(monkeypatch, table, rebuild_interval=0)
+    assert blacklist.contains("logged-out")
+
+    seen_during_rebuild = []
+    table.on_full_read = lambda: seen_during_rebuild.append(blacklist._bloom.might_contain(table.visible[1]))
+    assert blacklist.contains("logged-out")
+
+    assert seen_during_rebuild == [True]
+
+
+def test_rows_committed_out_of_order_are_not_skipped(monkeypatch):
+    table = FakeBlacklistTable()
+    table.visible[1] = token_fingerprint("first")
+    blacklist = create_blacklist(monkeypatch, table)
+    assert blacklist.contains("first")
+
+    table.visible[3] = token_fingerprint("third")
+    assert blacklist.contains("third")
+
+    table.visible[2] = token_fingerprint("second")
+    assert blacklist.contains("second")
+
+
+def test_gap_is_given_up_after_settle_time(monkeypatch):
+    table = FakeBlacklistTable()
+    table.visible[1] = token_fingerprint("first")
+    blacklist = create_blacklist(monkeypatch, table, settle_seconds=0)
+    blacklist.contains("first")
+
+    table.visible[3] = token_fingerprint("third")
+    blacklist.contains("third")
+    blacklist.contains("third")
+
+    assert blacklist._last_id == 3
+
+
+def test_purge_runs_outside_the_request_session(monkeypatch):
+    table = FakeBlacklistTable()
+    blacklist = create_blacklist(monkeypatch, table)
+
+    session = database.begin_session()
+    try:
+        blacklist.contains("token")
+    finally:
+        database.end_session()
+
+    assert table.deleted_in_session == [False]
+    assert not session.wrote
+
+
+def test_first_refresh_builds_the_filter_on_a_freshly_booted_host(monkeypatch):
+    table = FakeBlacklistTable()
+    table.visible[1] = token_fingerprint("logged-out-elsewhere")
+    monkeypatch.setattr(token_blacklist.time, "monotonic", lambda: 0.5)
+    blacklist = create_blacklist(monkeypatch, table)
+    blacklist.refresh_interval = 1
+
+    assert blacklist.contains("logged-out-elsewhere")
+    assert blacklist._last_id == 1